@@ -52,11 +52,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,6 +94,45 @@ DATABASES = {
     }
 }
 
+if os.environ.get('DATABASE_URL'):
+    import dj_database_url
+
+    DATABASES['default'] = dj_database_url.config()
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        'interest': os.environ.get('THROTTLE_INTEREST_RATE', '60/min'),
+        'interest_email': os.environ.get('THROTTLE_INTEREST_EMAIL_RATE', '20/hour'),
+        'login': os.environ.get('THROTTLE_LOGIN_RATE', '30/min'),
+        'login_email': os.environ.get('THROTTLE_LOGIN_EMAIL_RATE', '10/min'),
+        'signup': os.environ.get('THROTTLE_SIGNUP_RATE', '20/hour'),
+    },
+    # Proxies in front of the app that append to X-Forwarded-For, 0 keys clients on REMOTE_ADDR
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Rate limit counters are shared by every process through this cache
+THROTTLE_CACHE = 'default'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -112,6 +153,33 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+# The first hasher of the profile hashes new passwords, the others only verify old hashes
+PASSWORD_HASHER_PROFILES = {
+    'argon2': [
+        'core.hashers.TunedArgon2PasswordHasher',
+        'core.hashers.TunedPBKDF2PasswordHasher',
+    ],
+    'pbkdf2': [
+        'core.hashers.TunedPBKDF2PasswordHasher',
+        'core.hashers.TunedArgon2PasswordHasher',
+    ],
+}
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[os.environ.get('PASSWORD_HASHER_PROFILE', 'argon2')]
+
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 260000))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 19456))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 1))
+PASSWORD_HASHING_THREADS = int(os.environ.get('PASSWORD_HASHING_THREADS', os.cpu_count() or 1))
+
+# Remember successful password checks in process for LOGIN_CACHE_TIMEOUT seconds, 0 turns it off
+LOGIN_CACHE_SIZE = int(os.environ.get('LOGIN_CACHE_SIZE', 1024))
+LOGIN_CACHE_TIMEOUT = int(os.environ.get('LOGIN_CACHE_TIMEOUT', 0))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
 
@@ -138,6 +206,60 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 AUTH_USER_MODEL = 'core.User'
 
+
+# Token authentication cache
+
+TOKEN_CACHE = 'default'
+TOKEN_CACHE_TIMEOUT = int(os.environ.get('TOKEN_CACHE_TIMEOUT', 300))
+TOKEN_LOCAL_CACHE_SIZE = int(os.environ.get('TOKEN_LOCAL_CACHE_SIZE', 1024))
+TOKEN_LOCAL_CACHE_TIMEOUT = int(os.environ.get('TOKEN_LOCAL_CACHE_TIMEOUT', 5))
+
+
+# Profile cache
+
+PROFILE_CACHE = 'default'
+PROFILE_CACHE_TIMEOUT = int(os.environ.get('PROFILE_CACHE_TIMEOUT', 300))
+
+
+# Item feed
+
+ITEM_FEED_PAGE_SIZE = int(os.environ.get('ITEM_FEED_PAGE_SIZE', 20))
+ITEM_FEED_MAX_PAGE_SIZE = int(os.environ.get('ITEM_FEED_MAX_PAGE_SIZE', 100))
+ITEM_FEED_CACHE = 'default'
+ITEM_FEED_CACHE_TIMEOUT = int(os.environ.get('ITEM_FEED_CACHE_TIMEOUT', 300))
+ITEM_BULK_MAX_ROWS = int(os.environ.get('ITEM_BULK_MAX_ROWS', 1000))
+ITEM_BULK_BATCH_SIZE = int(os.environ.get('ITEM_BULK_BATCH_SIZE', 250))
+ITEM_EXPORT_CHUNK_SIZE = int(os.environ.get('ITEM_EXPORT_CHUNK_SIZE', 500))
+
+ITEM_ARCHIVE_AFTER_DAYS = int(os.environ.get('ITEM_ARCHIVE_AFTER_DAYS', 90))
+
+ITEM_FAST_SERIALIZATION = os.environ.get('ITEM_FAST_SERIALIZATION', '1') == '1'
+ITEM_INTEREST_NOTIFY_DELAY = int(os.environ.get('ITEM_INTEREST_NOTIFY_DELAY', 60))
+
+# Serve the busiest item endpoints as coroutine views, app/asgi.py turns this on
+ITEM_ASYNC_VIEWS = os.environ.get('ITEM_ASYNC_VIEWS', '0') == '1'
+
+# Compression of API responses, static files are precompressed by WhiteNoise
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+COMPRESSION_CONTENT_TYPES = ('application/json', 'text/html')
+
+# Task queue
+
+QUEUE_BATCH_SIZE = int(os.environ.get('QUEUE_BATCH_SIZE', 50))
+QUEUE_POLL_SECONDS = float(os.environ.get('QUEUE_POLL_SECONDS', 1))
+QUEUE_LEASE_SECONDS = int(os.environ.get('QUEUE_LEASE_SECONDS', 300))
+QUEUE_MAX_ATTEMPTS = int(os.environ.get('QUEUE_MAX_ATTEMPTS', 5))
+QUEUE_BACKOFF_SECONDS = int(os.environ.get('QUEUE_BACKOFF_SECONDS', 30))
+QUEUE_BACKOFF_MAX_SECONDS = int(os.environ.get('QUEUE_BACKOFF_MAX_SECONDS', 3600))
+
+# Email
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'classifieds@localhost')
+
 """Settings for staging environment"""
 if 'HOME' in os.environ and os.environ['HOME'] == '/app':
     import django_heroku
@@ -166,11 +288,9 @@ if 'HOME' in os.environ and os.environ['HOME'] == os.environ.get('USER_HOME'):
 
     DEBUG = False
 
-    REST_FRAMEWORK = {
-        'DEFAULT_RENDERER_CLASSES': (
-            'rest_framework.renderers.JSONRenderer',
-        )
-    }
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'core.renderers.FastJSONRenderer',
+    )
 
     DATABASES = {
         'default': {
@@ -182,3 +302,41 @@ if 'HOME' in os.environ and os.environ['HOME'] == os.environ.get('USER_HOME'):
             'PASSWORD': os.environ.get('DB_PASS'),
         }
     }
+
+"""Read replicas"""
+# Safe requests to REPLICA_VIEW_MODULES read from one of REPLICA_DATABASES, unless the
+# client wrote within the last REPLICA_PIN_SECONDS. DATABASE_REPLICA_URLS lists the
+# replicas; without it a 'replica' alias mirroring default is kept for the tests.
+DATABASE_ROUTERS = ['core.db.routers.ReplicaRouter']
+REPLICA_VIEW_MODULES = ['item.views']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+REPLICA_PIN_CACHE = 'default'
+
+REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+if REPLICA_URLS:
+    import dj_database_url
+
+    REPLICA_DATABASES = ['replica_%d' % index for index in range(1, len(REPLICA_URLS) + 1)]
+    for alias, url in zip(REPLICA_DATABASES, REPLICA_URLS):
+        DATABASES[alias] = dict(dj_database_url.parse(url), TEST={'MIRROR': 'default'})
+else:
+    REPLICA_DATABASES = []
+    DATABASES['replica'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+
+"""Connection policy for whichever Postgres database was configured above"""
+# Connections live for DB_CONN_MAX_AGE seconds, or are handed back to a per process
+# pool of DB_POOL_SIZE idle connections at the end of every request when that is set.
+# DB_PGBOUNCER=1 keeps queries compatible with pgbouncer's transaction pooling.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+DB_POOL_MAX_LIFETIME = int(os.environ.get('DB_POOL_MAX_LIFETIME', 3600))
+DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', '0') == '1'
+
+for database in DATABASES.values():
+    if database['ENGINE'] in ('django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2'):
+        database['ENGINE'] = 'core.db.backends.postgresql'
+        database['CONN_MAX_AGE'] = 0 if DB_POOL_SIZE else DB_CONN_MAX_AGE
+        database['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+        database['POOL'] = {'MAX_SIZE': DB_POOL_SIZE, 'MAX_LIFETIME': DB_POOL_MAX_LIFETIME} if DB_POOL_SIZE else None
+        database['DISABLE_SERVER_SIDE_CURSORS'] = DB_PGBOUNCER
@@ -0,0 +1,62 @@
+"""Benchmark the bulk item import against one POST per item.
+
+Run from the repository root:
+
+    python benchmarks/bench_bulk_create.py --items 1000
+
+Targets on a single core against SQLite: a 1000 item bulk request completes
+in under a second, and bulk import sustains at least 10x the items per second
+of posting the same items one at a time.
+"""
+import argparse
+import json
+
+from harness import test_database, timed
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Item
+
+
+def payload(count):
+    return [{
+        'name': 'Item %d' % i,
+        'price': i,
+        'description': 'Description of item %d' % i,
+        'url': 'c2c.com/static/item%d.jpg' % i,
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    args = parser.parse_args()
+
+    with test_database():
+        user = get_user_model().objects.create_user('bench@c2c.com', 'benchpassword')
+        client = APIClient()
+        client.force_authenticate(user)
+        items = payload(args.items)
+
+        def single():
+            for item in items:
+                client.post(reverse('item:collection'), item, format='json')
+
+        def bulk():
+            client.post(reverse('item:bulk'), json.dumps(items), content_type='application/json')
+
+        single_time = timed(single)
+        Item.objects.all().delete()
+        bulk_time = timed(bulk)
+
+        print('%d items' % args.items)
+        print('single POSTs  %8.3fs  %10.0f items/s' % (single_time, args.items / single_time))
+        print('bulk POST     %8.3fs  %10.0f items/s' % (bulk_time, args.items / bulk_time))
+        print('speedup       %8.1fx' % (single_time / bulk_time))
+
+
+if __name__ == '__main__':
+    main()
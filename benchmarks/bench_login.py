@@ -0,0 +1,67 @@
+"""Benchmark logins per second per core under each password hashing policy.
+
+Run from the repository root:
+
+    python benchmarks/bench_login.py --logins 50 --threads 1 4
+
+Every login goes through django.contrib.auth.authenticate, like CreateToken
+does, for a user whose password was hashed under the same policy. Dividing
+by the number of threads gives the rate per core as long as there are at
+least that many cores.
+"""
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from harness import test_database, timed
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.test import override_settings
+
+from core import hashers
+
+
+POLICIES = (
+    ('pbkdf2 260000', {'PASSWORD_HASHERS': settings.PASSWORD_HASHER_PROFILES['pbkdf2'], 'PASSWORD_PBKDF2_ITERATIONS': 260000}),
+    ('argon2 django default', {
+        'PASSWORD_HASHERS': settings.PASSWORD_HASHER_PROFILES['argon2'],
+        'PASSWORD_ARGON2_TIME_COST': 2, 'PASSWORD_ARGON2_MEMORY_COST': 102400, 'PASSWORD_ARGON2_PARALLELISM': 8,
+    }),
+    ('argon2 tuned', {
+        'PASSWORD_HASHERS': settings.PASSWORD_HASHER_PROFILES['argon2'],
+        'PASSWORD_ARGON2_TIME_COST': 2, 'PASSWORD_ARGON2_MEMORY_COST': 19456, 'PASSWORD_ARGON2_PARALLELISM': 1,
+    }),
+)
+
+
+def login(index):
+    assert authenticate(username='bench%d@c2c.com' % index, password='benchpassword') is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    print('%d cores' % os.cpu_count())
+    with test_database():
+        for name, policy in POLICIES:
+            with override_settings(PASSWORD_HASHING_THREADS=max(args.threads), **policy):
+                get_user_model().objects.all().delete()
+                for index in range(max(args.threads)):
+                    get_user_model().objects.create_user('bench%d@c2c.com' % index, 'benchpassword')
+
+                for threads in args.threads:
+                    with ThreadPoolExecutor(threads) as executor:
+                        elapsed = timed(lambda: list(executor.map(login, [i % threads for i in range(args.logins)])))
+                    print('%-22s %2d threads  %7.1f logins/s  %7.1f per thread' % (
+                        name, threads, args.logins / elapsed, args.logins / elapsed / threads
+                    ))
+
+            hashers.shutdown_pool()
+
+
+if __name__ == '__main__':
+    main()
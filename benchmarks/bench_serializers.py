@@ -0,0 +1,61 @@
+"""Benchmark rendering the item feed through ItemSerializer and through the values() fast path.
+
+Run from the repository root:
+
+    python benchmarks/bench_serializers.py --sizes 10 100 1000 --repeat 20
+
+Each run builds the full JSON body of a page of items, buyers included, the
+same work the feed does on a cache miss minus the HTTP layer.
+"""
+import argparse
+
+from harness import test_database, timed
+
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Buyer, Item
+from core.renderers import FastJSONRenderer
+from item.fastpath import item_columns, serialize_items
+from item.serializers import ItemSerializer
+
+
+def drf_path(limit):
+    items = Item.objects.for_listing().order_by('-created_at', '-id')[:limit]
+    return JSONRenderer().render(ItemSerializer(items, many=True).data)
+
+
+def fast_path(limit):
+    fields = ItemSerializer.Meta.fields
+    rows = Item.objects.order_by('-created_at', '-id').values(*item_columns(fields))[:limit]
+    return FastJSONRenderer().render(serialize_items(rows, fields))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with test_database():
+        user = get_user_model().objects.create_user('bench@c2c.com', 'benchpassword')
+        items = Item.objects.bulk_create([
+            Item(user=user, name='Item %d' % i, price=i, description='Item %d' % i, url='c2c.com/static/item.jpg')
+            for i in range(max(args.sizes))
+        ])
+        buyers = Buyer.objects.bulk_create([
+            Buyer(name='Buyer %d' % i, email='buyer%d@c2c.com' % i, location='Lagos') for i in range(3)
+        ])
+        Item.buyers.through.objects.bulk_create([
+            Item.buyers.through(item=item, buyer=buyer) for item in items[::2] for buyer in buyers
+        ])
+
+        for size in args.sizes:
+            assert drf_path(size) == fast_path(size)
+            drf = timed(lambda: drf_path(size), args.repeat)
+            fast = timed(lambda: fast_path(size), args.repeat)
+            print('%5d items  serializer %8.2fms  fast path %8.2fms  %5.1fx' % (size, drf * 1000, fast * 1000, drf / fast))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Hammer a running server with concurrent keep-alive connections and report throughput and latency.
+
+Start the server under test first, for example the WSGI and ASGI workers with
+the same number of processes:
+
+    $ gunicorn app.wsgi --workers 2 --bind 127.0.0.1:8000
+    $ gunicorn app.asgi --workers 2 --worker-class uvicorn.workers.UvicornWorker --bind 127.0.0.1:8000
+
+then run:
+
+    $ python benchmarks/load_test.py http://127.0.0.1:8000/api/items/ --concurrency 200 --duration 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def fetch(reader, writer, request):
+    """Send one request on an open connection and read the whole response"""
+    writer.write(request)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+
+    length, close = 0, False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'connection' and value.strip().lower() == 'close':
+            close = True
+
+    await reader.readexactly(length)
+    return int(status_line.split()[1]), close
+
+
+async def client(host, port, request, deadline, latencies, failures):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+
+            start = time.perf_counter()
+            status, close = await fetch(reader, writer, request)
+            latencies.append(time.perf_counter() - start)
+
+            if status >= 500:
+                failures.append(status)
+            if close:
+                writer.close()
+                writer = None
+        except (ConnectionError, OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            failures.append(type(exc).__name__)
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+
+    if writer is not None:
+        writer.close()
+
+
+async def run(url, concurrency, duration, headers):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+
+    lines = ['GET %s HTTP/1.1' % path, 'Host: %s' % parts.netloc, 'Accept: application/json'] + headers
+    request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    latencies, failures = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        client(parts.hostname, parts.port or 80, request, deadline, latencies, failures) for _ in range(concurrency)
+    ])
+
+    return latencies, failures
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--header', action='append', default=[], help='Extra header, e.g. "Authorization: Token ..."')
+    args = parser.parse_args()
+
+    latencies, failures = asyncio.run(run(args.url, args.concurrency, args.duration, args.header))
+    latencies.sort()
+
+    print('Connections: %d, duration: %.0fs' % (args.concurrency, args.duration))
+    print('Requests: %d (%.0f/s), failures: %d' % (len(latencies), len(latencies) / args.duration, len(failures)))
+    if latencies:
+        print('Latency p50 %.1fms, p99 %.1fms, mean %.1fms' % (
+            percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000, statistics.mean(latencies) * 1000
+        ))
+
+
+if __name__ == '__main__':
+    main()
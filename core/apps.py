@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import search
+        import core.signals  # noqa: F401
+
+        post_migrate.connect(search.sync_sqlite_search, sender=self)
@@ -0,0 +1,48 @@
+"""Serve DRF views as coroutines under ASGI.
+
+DRF and the Django 3.2 ORM are synchronous, there is no async queryset API to
+await yet. What a coroutine view buys under an ASGI server is that the event
+loop owns the connection while the request waits, and the whole dispatch
+(authentication, queries and rendering) runs in a single hop to a thread.
+
+Django 3.2 runs every thread sensitive call of a worker on one shared thread,
+so the dispatch goes to the event loop's thread pool instead and concurrent
+requests run their queries in parallel. Connections belong to those pool
+threads, which Django's own request signals never see, so each request closes
+its thread's connection when it is broken or past CONN_MAX_AGE, as Django does
+for sync requests.
+"""
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+class AsyncAPIViewMixin:
+    """Turn an APIView into a coroutine view that renders its response off the event loop"""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        dispatch = sync_to_async(cls.render_view(view), thread_sensitive=False)
+
+        async def async_view(request, *args, **kwargs):
+            return await dispatch(request, *args, **kwargs)
+
+        # Carries over cls, initkwargs and csrf_exempt from the DRF view
+        return update_wrapper(async_view, view)
+
+    @staticmethod
+    def render_view(view):
+        def render(request, *args, **kwargs):
+            close_old_connections()
+            try:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+            finally:
+                close_old_connections()
+
+            return response
+
+        return render
@@ -0,0 +1,117 @@
+"""Token authentication that resolves tokens from a cache instead of the database.
+
+Resolutions are kept in the shared cache, fronted by a small in-process LRU so
+hot tokens cost neither a query nor a cache round-trip. Only the user's id,
+email and flags are cached. Once a token delete or a save of its user commits,
+both layers are evicted in this process and the shared layer for every
+process; other processes drop their local copy when its short TTL ends.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+class LocalTTLCache:
+    """Bounded, thread safe LRU cache whose entries expire after a fixed timeout"""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_tokens = LocalTTLCache(settings.TOKEN_LOCAL_CACHE_SIZE, settings.TOKEN_LOCAL_CACHE_TIMEOUT)
+
+
+def token_cache():
+    return caches[settings.TOKEN_CACHE]
+
+
+def token_cache_key(key):
+    return 'auth:token:%s' % key
+
+
+def invalidate_tokens(keys):
+    keys = list(keys)
+    for key in keys:
+        local_tokens.delete(key)
+
+    token_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication with token to user resolutions cached in two layers"""
+
+    # Only what authentication and permissions read is cached, never the password hash
+    USER_FIELDS = ('id', 'email', 'is_active', 'is_staff', 'is_superuser')
+
+    def authenticate_credentials(self, key):
+        values = local_tokens.get(key)
+
+        if values is None:
+            cache = token_cache()
+            values = cache.get(token_cache_key(key))
+
+            if values is None:
+                model = self.get_model()
+                lookups = ['user__%s' % field for field in self.USER_FIELDS]
+                values = model.objects.filter(key=key).values_list(*lookups).first()
+                if values is None:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+                cache.set(token_cache_key(key), values, settings.TOKEN_CACHE_TIMEOUT)
+
+            local_tokens.set(key, values)
+
+        # A fresh instance per request, the other fields are deferred and saves only write the loaded ones
+        user = self.build_user(dict(zip(self.USER_FIELDS, values)))
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = self.get_model()(key=key, user=user)
+        return (user, token)
+
+    def build_user(self, values):
+        # from_db takes the loaded values in field order
+        model = get_user_model()
+        names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+        return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
@@ -0,0 +1,97 @@
+"""Content negotiation and encoding for compressed API responses.
+
+Brotli is used when the brotli package is installed and the client accepts
+it, gzip otherwise. Bodies smaller than COMPRESSION_MIN_SIZE are sent as they
+are, compressing them costs more than the bytes it saves.
+"""
+import gzip
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def available_encodings():
+    """Supported content codings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip', )
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an Accept-Encoding header to its quality value"""
+    weights = {}
+    for part in header.split(','):
+        coding, *params = [value.strip() for value in part.split(';')]
+        if not coding:
+            continue
+
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+
+    return weights
+
+
+def negotiate(request):
+    """Return the best content coding the client accepts, or None for the identity"""
+    weights = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def encode(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    # A fixed mtime keeps the output, and so any cached copy, the same for the same content
+    return gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compressible(response):
+    """Whether response is a body of a type worth compressing that is not encoded yet"""
+    if response.streaming or response.has_header('Content-Encoding'):
+        return False
+
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type in settings.COMPRESSION_CONTENT_TYPES
+
+
+def set_encoded_content(response, content, encoding):
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding', ))
+
+
+def compress_response(request, response):
+    """Compress response in place for the client, returning the coding used or None"""
+    if not compressible(response):
+        return None
+
+    patch_vary_headers(response, ('Accept-Encoding', ))
+
+    encoding = negotiate(request)
+    if encoding is None or len(response.content) < settings.COMPRESSION_MIN_SIZE:
+        return None
+
+    content = encode(response.content, encoding)
+    if len(content) >= len(response.content):
+        return None
+
+    set_encoded_content(response, content, encoding)
+    return encoding
@@ -0,0 +1,82 @@
+"""Postgres backend adding connection health checks and an optional connection pool.
+
+Extra keys read from the database settings:
+
+    CONN_HEALTH_CHECKS  Ping a reused connection before its first query in a
+                        request and reconnect if the server has dropped it.
+    POOL                {'MAX_SIZE': ..., 'MAX_LIFETIME': ...} to hand closed
+                        connections back to a process wide pool, or None.
+"""
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.backends.postgresql.creation import DatabaseCreation
+from core.db.pool import ConnectionPool, get_pool
+
+
+def reset_connection(connection):
+    """Roll back whatever the last user left open, broken connections are not reused"""
+    status = connection.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool = None
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            self.pool = None
+            return super().get_new_connection(conn_params)
+
+        # Connections to another database name, e.g. the test database, get a pool of their own
+        key = (self.alias, repr(sorted(conn_params.items())))
+        self.pool = get_pool(key, lambda: ConnectionPool(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            reset_connection,
+            max_size=options.get('MAX_SIZE', 10),
+            max_lifetime=options.get('MAX_LIFETIME'),
+        ))
+
+        connection = self.pool.acquire()
+        self.isolation_level = self.settings_dict['OPTIONS'].get('isolation_level', connection.isolation_level)
+
+        return connection
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def _close(self):
+        if self.connection is not None and self.pool is not None:
+            with self.wrap_database_errors:
+                return self.pool.release(self.connection)
+
+        return super()._close()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def close_if_health_check_failed(self):
+        """Reconnect once per request if the server dropped the connection while it sat idle"""
+        if self.connection is None or self.health_check_done or not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            return
+
+        if not self.is_usable():
+            self.close()
+        self.health_check_done = True
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
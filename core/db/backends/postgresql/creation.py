@@ -0,0 +1,11 @@
+from django.db.backends.postgresql import creation
+
+from core.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def destroy_test_db(self, *args, **kwargs):
+        # Pooled connections to the test database would keep it from being dropped
+        close_pools()
+        super().destroy_test_db(*args, **kwargs)
@@ -0,0 +1,99 @@
+"""A process wide pool of idle database connections shared by every thread.
+
+Django keeps one connection per thread and closes it at the end of the
+request unless CONN_MAX_AGE says otherwise. Under ASGI every request gets a
+new thread, so persistent connections are never reused. Handing connections
+back to a pool instead lets the next request, on any thread, skip the TCP and
+authentication round trips of a fresh connection.
+"""
+import threading
+import time
+
+
+class ConnectionPool:
+    """Keep up to max_size idle connections for at most max_lifetime seconds.
+
+    The pool does not cap how many connections are open at once, a server side
+    pooler such as pgbouncer is the place for that. reset is called with every
+    released connection and returns False when it should be discarded.
+    """
+
+    def __init__(self, connect, reset, max_size, max_lifetime=None):
+        self.connect = connect
+        self.reset = reset
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle = []
+        self.opened = {}
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.idle:
+                connection = self.idle.pop()
+                if not self.expired(connection, now):
+                    return connection
+                self.discard(connection)
+
+        connection = self.connect()
+        with self.lock:
+            self.opened[id(connection)] = now
+
+        return connection
+
+    def release(self, connection):
+        try:
+            reusable = self.reset(connection)
+        except Exception:
+            reusable = False
+
+        with self.lock:
+            if reusable and len(self.idle) < self.max_size and not self.expired(connection, time.monotonic()):
+                self.idle.append(connection)
+                return
+
+        self.discard(connection)
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+
+        for connection in idle:
+            self.discard(connection)
+
+    def expired(self, connection, now):
+        if getattr(connection, 'closed', False):
+            return True
+        if self.max_lifetime is None:
+            return False
+
+        return now - self.opened.get(id(connection), now) >= self.max_lifetime
+
+    def discard(self, connection):
+        self.opened.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(key, factory):
+    """Return the pool registered under key, creating it with factory on first use"""
+    with pools_lock:
+        if key not in pools:
+            pools[key] = factory()
+
+        return pools[key]
+
+
+def close_pools():
+    """Close every idle pooled connection, e.g. after forking or between test runs"""
+    with pools_lock:
+        for pool in pools.values():
+            pool.close()
+        pools.clear()
@@ -0,0 +1,30 @@
+"""Route the reads of safe item requests to a read replica.
+
+ReplicaRoutingMiddleware picks, once per request, the replica its reads may be
+served by, the router only follows that choice. Writes, and reads made
+outside such a request (management commands, signals of unsafe requests, the
+body of a streamed response), always go to the default database.
+"""
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+read_replica = ContextVar('read_replica', default=None)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return read_replica.get()
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica would otherwise be written back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in settings.REPLICA_DATABASES else None
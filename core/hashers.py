@@ -0,0 +1,95 @@
+"""Password hashers tuned from settings, and a bound on how many run at once.
+
+PASSWORD_HASHER_PROFILE picks the preferred hasher in settings. Hashes made
+with any other listed hasher, or with other costs, still verify and are
+rehashed with the preferred one on the user's next successful login.
+
+At most PASSWORD_HASHING_THREADS hashes run at once in a process, on the
+threads of the requests that need them. Argon2 and PBKDF2 release the GIL, so
+this is real parallelism up to the core count. A request over the limit waits
+on its own thread for a slot, and holds its worker while it waits. The limit
+is per process, so a server with several workers hashes up to workers times
+PASSWORD_HASHING_THREADS passwords at once. import_users hashes on a pool of
+the same size.
+"""
+import hashlib
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+from core.authentication import LocalTTLCache
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 with PASSWORD_PBKDF2_ITERATIONS iterations"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with the PASSWORD_ARGON2_* costs"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(settings.PASSWORD_HASHING_THREADS, thread_name_prefix='password-hashing')
+
+    return _pool
+
+
+def hashing_slots():
+    global _slots
+    with _pool_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(settings.PASSWORD_HASHING_THREADS)
+
+    return _slots
+
+
+def shutdown_pool():
+    """Stop the hashing threads and drop the slots, the next hash sizes them from settings again"""
+    global _pool, _slots
+    with _pool_lock:
+        pool, _pool, _slots = _pool, None, None
+
+    if pool is not None:
+        pool.shutdown()
+
+
+def run(func, *args):
+    """Run a hashing function on this thread once one of the process's hashing slots is free"""
+    with hashing_slots():
+        return func(*args)
+
+
+# Successful checks, keyed by a MAC of the password and the hash it matched, never shared across processes
+verified_logins = LocalTTLCache(settings.LOGIN_CACHE_SIZE, settings.LOGIN_CACHE_TIMEOUT)
+
+
+def login_cache_key(raw_password, encoded):
+    message = '{}\0{}'.format(encoded, raw_password).encode('utf-8')
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), message, hashlib.sha256).hexdigest()
@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Move items sold more than --days days ago, with their buyer links, into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ITEM_ARCHIVE_AFTER_DAYS, help='Archive items sold more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of items moved per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be a positive number')
+
+        # Fixed for the whole run, so items sold while it runs are left for the next one
+        before = timezone.now() - timedelta(days=options['days'])
+
+        archived = 0
+        while True:
+            count = Item.objects.archive_sold(before, options['batch_size'])
+            if not count:
+                break
+
+            archived += count
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write('Archived %d items' % archived)
@@ -0,0 +1,102 @@
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from core import hashers
+from user.serializers import ImportUserSerializer
+
+
+COLUMNS = ('email', 'password', 'first_name', 'last_name', 'state_of_residence')
+
+
+class Command(BaseCommand):
+    help = 'Create users and their profiles from a CSV file with %s columns' % ', '.join(COLUMNS)
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import, - reads standard input')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of users inserted per transaction')
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help='Worker processes hashing passwords, 0 hashes on the threads of this process'
+        )
+
+    def handle(self, *args, **options):
+        batch_size, processes = options['batch_size'], options['processes']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be a positive number')
+        if processes < 0:
+            raise CommandError('--processes must not be negative')
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        executor = ProcessPoolExecutor(processes, initializer=django.setup) if processes else hashers.hashing_pool()
+        # Hand each process a few chunks per batch, so they stay busy without a round trip per password
+        self.chunksize = max(1, batch_size // (processes * 4)) if processes else 1
+        try:
+            reader = csv.DictReader(stream)
+            missing = [column for column in COLUMNS if column not in (reader.fieldnames or ())]
+            if missing:
+                raise CommandError('Please provide the %s columns' % ', '.join(missing))
+
+            # Line numbers count the header, so they match what an editor shows
+            lines = enumerate(reader, start=2)
+            imported = skipped = 0
+            while True:
+                batch = list(islice(lines, batch_size))
+                if not batch:
+                    break
+
+                rows = self.validate(batch)
+                self.insert(rows, executor)
+                imported += len(rows)
+                skipped += len(batch) - len(rows)
+        finally:
+            if processes:
+                executor.shutdown()
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write('Imported %d users, skipped %d' % (imported, skipped))
+
+    def validate(self, batch):
+        """Return the valid rows of a batch whose email is not taken, reporting the others"""
+        User = get_user_model()
+
+        rows, seen = [], set()
+        for line, row in batch:
+            serializer = ImportUserSerializer(data=row)
+            if not serializer.is_valid():
+                errors = '; '.join('%s: %s' % (field, ' '.join(messages)) for field, messages in serializer.errors.items())
+                self.stderr.write('Line %d: %s' % (line, errors))
+                continue
+
+            data = dict(serializer.validated_data, email=User.objects.normalize_email(serializer.validated_data['email']))
+            if data['email'] in seen:
+                self.stderr.write('Line %d: email %s appears more than once' % (line, data['email']))
+                continue
+
+            seen.add(data['email'])
+            rows.append((line, data))
+
+        existing = set(User.objects.filter(email__in=seen).values_list('email', flat=True))
+        for line, data in rows:
+            if data['email'] in existing:
+                self.stderr.write('Line %d: a user with email %s already exists' % (line, data['email']))
+
+        return [data for line, data in rows if data['email'] not in existing]
+
+    def insert(self, rows, executor):
+        if not rows:
+            return
+
+        passwords = executor.map(make_password, [row['password'] for row in rows], chunksize=self.chunksize)
+
+        get_user_model().objects.bulk_create_with_profiles([
+            dict(row, password=password) for row, password in zip(rows, passwords)
+        ])
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Item
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized seller_state and interest_count columns of every item'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of items updated per statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be a positive number')
+
+        # Walk the primary key so every batch is a short index range and a short lock
+        last, updated = None, 0
+        while True:
+            items = Item.objects.order_by('pk')
+            if last is not None:
+                items = items.filter(pk__gt=last)
+
+            batch = list(items.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+
+            updated += Item.objects.filter(pk__in=batch).rebuild_denormalized()
+            last = batch[-1]
+
+        self.stdout.write('Rebuilt %d items' % updated)
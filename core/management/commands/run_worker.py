@@ -0,0 +1,39 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import queue
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the tasks that are due now and exit')
+        parser.add_argument('--batch-size', type=int, default=settings.QUEUE_BATCH_SIZE, help='Number of tasks claimed at a time')
+        parser.add_argument('--poll', type=float, default=settings.QUEUE_POLL_SECONDS, help='Seconds to wait when no task is due')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        total = 0
+        while self.running:
+            close_old_connections()
+            count = queue.work(options['batch_size'])
+            total += count
+
+            if options['once'] and not count:
+                break
+            if not count:
+                time.sleep(options['poll'])
+
+        self.stdout.write('Ran %d tasks' % total)
+
+    def stop(self, signum, frame):
+        """Finish the current batch before exiting"""
+        self.running = False
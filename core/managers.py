@@ -1,4 +1,15 @@
+from uuid import uuid4 as uid
+
+from django.apps import apps
 from django.contrib.auth.models import BaseUserManager
+from django.db import connections, models, transaction
+from django.utils import timezone
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from core import search
+from utils.prices import PRICE_BUCKETS
+from utils.states import STATE_CHOICES
 
 
 class UserManager(BaseUserManager):
@@ -16,9 +27,258 @@ class UserManager(BaseUserManager):
 
     def create_superuser(self, email, password):
         """Creates and saves a new superuser"""
-        user = self.create_user(email, password)
-        user.is_staff = True
-        user.is_superuser = True
-        user.save(using=self._db)
+        return self.create_user(email, password, is_staff=True, is_superuser=True)
 
-        return user
+    def bulk_create_with_profiles(self, rows, batch_size=None):
+        """Insert users with already hashed passwords and their profiles, in one transaction.
+
+        Each row holds the user's email and password hash and the profile's
+        first_name, last_name and state_of_residence. Returns the users.
+        """
+        Profile = apps.get_model('core', 'Profile')
+
+        users, profiles = [], []
+        for row in rows:
+            user = self.model(email=self.normalize_email(row['email']), password=row['password'])
+            users.append(user)
+            profiles.append(Profile(
+                user=user,
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                state_of_residence=row['state_of_residence'],
+            ))
+
+        # Primary keys are generated here, so profiles need nothing back from the user inserts
+        with transaction.atomic(using=self._db):
+            self.bulk_create(users, batch_size=batch_size)
+            Profile.objects.using(self._db).bulk_create(profiles, batch_size=batch_size)
+
+        return users
+
+
+class ProfileManager(models.Manager):
+
+    def state_of(self, user):
+        """Return the user's state of residence, or an empty string if they have no profile"""
+        return self.filter(user=user).values_list('state_of_residence', flat=True).first() or ''
+
+
+class BuyerManager(models.Manager):
+
+    @classmethod
+    def normalize_email(cls, email):
+        """Buyers are identified by email, so compare them case and whitespace insensitively"""
+        return (email or '').strip().lower()
+
+
+class ListingQuerySet(models.QuerySet):
+    """Queries shared by the items and the archived items, which list the same way"""
+
+    LISTING_FIELDS = ('id', 'user', 'name', 'price', 'description', 'url', 'created_at', 'updated_at')
+
+    def for_listing(self, fields=None):
+        """Fetch only the given columns, by default those the item serializer emits, and batch load the buyers.
+
+        'buyers' among the fields stands for the prefetch rather than a column.
+        """
+        fields = self.LISTING_FIELDS + ('buyers', ) if fields is None else fields
+        queryset = self.only(*[field for field in fields if field != 'buyers'])
+
+        if 'buyers' not in fields:
+            return queryset
+
+        buyers = apps.get_model('core', 'Buyer').objects.order_by('email')
+        return queryset.prefetch_related(models.Prefetch('buyers', queryset=buyers))
+
+
+class ItemQuerySet(ListingQuerySet):
+
+    def rebuild_denormalized(self):
+        """Recompute seller_state and interest_count from the profile and buyer tables"""
+        profiles = apps.get_model('core', 'Profile').objects
+        seller_state = profiles.filter(user=models.OuterRef('user')).values('state_of_residence')[:1]
+
+        return self.update(
+            seller_state=Coalesce(models.Subquery(seller_state), models.Value('')),
+            interest_count=self.interest_count_subquery(),
+        )
+
+    def interest_count_subquery(self):
+        links = self.model.buyers.through.objects.filter(item=models.OuterRef('pk'))
+        count = links.order_by().values('item').annotate(count=models.Count('*')).values('count')
+
+        return Coalesce(models.Subquery(count), models.Value(0))
+
+    def facets(self):
+        """Count the items per seller state and per price bucket in a single aggregate query"""
+        aggregates = {}
+        for code, _ in STATE_CHOICES:
+            aggregates['state_%s' % code] = models.Count('pk', filter=models.Q(seller_state=code))
+
+        bounds = list(zip(PRICE_BUCKETS, PRICE_BUCKETS[1:] + [None]))
+        for index, (low, high) in enumerate(bounds):
+            condition = models.Q(price__gte=low) if high is None else models.Q(price__gte=low, price__lt=high)
+            aggregates['price_%d' % index] = models.Count('pk', filter=condition)
+
+        counts = self.aggregate(**aggregates)
+
+        return {
+            'states': [
+                {'code': code, 'name': name, 'count': counts['state_%s' % code]}
+                for code, name in STATE_CHOICES
+            ],
+            'prices': [
+                {'min': low, 'max': high, 'count': counts['price_%d' % index]}
+                for index, (low, high) in enumerate(bounds)
+            ],
+        }
+
+    def search(self, query):
+        """Filter to items matching the query on name and description, annotated with a rank"""
+        vendor = connections[self.db].vendor
+
+        if vendor == 'postgresql':
+            from django.contrib.postgres.search import SearchQuery, SearchRank
+
+            vector = search.search_vector()
+            search_query = SearchQuery(query, config=search.SEARCH_CONFIG)
+            rank = Cast(SearchRank(vector, search_query), models.FloatField())
+
+            return self.annotate(search=vector, rank=rank).filter(search=search_query)
+
+        if vendor == 'sqlite':
+            return self.extra(
+                tables=[search.FTS_TABLE],
+                where=['%s.rowid = %s.rowid' % (search.FTS_TABLE, self.model._meta.db_table), '%s MATCH %%s' % search.FTS_TABLE],
+                params=[search.sqlite_match_expression(query)],
+            ).annotate(rank=RawSQL('-bm25(%s)' % search.FTS_TABLE, (), output_field=models.FloatField()))
+
+        raise NotImplementedError('Item search is not supported on %s' % vendor)
+
+    def mark_sold(self, user, item_ids):
+        """Mark the user's unsold items among item_ids as sold in a single UPDATE, returning the ids that changed"""
+        if not item_ids:
+            return []
+
+        if connections[self.db].vendor == 'postgresql':
+            return self._mark_sold_postgresql(user, item_ids)
+
+        return self._mark_sold(user, item_ids)
+
+    def _mark_sold_postgresql(self, user, item_ids):
+        sql = """
+            UPDATE {item} SET is_sold = true, sold_at = %s, updated_at = %s
+            WHERE id = ANY(%s::uuid[]) AND {user} = %s AND NOT is_sold
+            RETURNING id
+        """.format(item=self.model._meta.db_table, user=self.model._meta.get_field('user').column)
+        now = timezone.now()
+        params = [now, now, [str(id) for id in item_ids], user.pk]
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    def _mark_sold(self, user, item_ids):
+        # No RETURNING here, the ids are read under the same transaction as the update
+        with transaction.atomic(using=self.db):
+            items = self.model.objects.filter(pk__in=item_ids, user=user, is_sold=False)
+            changed = list(items.select_for_update().values_list('pk', flat=True))
+            now = timezone.now()
+            items.filter(pk__in=changed).update(is_sold=True, sold_at=now, updated_at=now)
+
+        return changed
+
+    def archive_sold(self, before, limit):
+        """Move up to limit items sold before the given time, with their buyer links, to the archive.
+
+        Each call is one transaction, so a failed batch leaves nothing half moved
+        and calling it until it returns 0 resumes wherever an earlier run stopped.
+        Returns the number of items moved.
+        """
+        ArchivedItem = apps.get_model('core', 'ArchivedItem')
+        links, archived_links = self.model.buyers.through, ArchivedItem.buyers.through
+        fields = [field.attname for field in ArchivedItem._meta.concrete_fields if field.name != 'archived_at']
+
+        with transaction.atomic(using=self.db):
+            # Oldest first, skipping rows another archiver holds so runs can overlap
+            sold = self.model.objects.filter(is_sold=True, sold_at__lt=before).order_by('sold_at', 'pk')
+            ids = list(sold.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            if not ids:
+                return 0
+
+            ArchivedItem.objects.bulk_create([ArchivedItem(**row) for row in self.model.objects.filter(pk__in=ids).values(*fields)])
+            archived_links.objects.bulk_create([
+                archived_links(archiveditem_id=item_id, buyer_id=buyer_id)
+                for item_id, buyer_id in links.objects.filter(item_id__in=ids).values_list('item_id', 'buyer_id')
+            ])
+            self.model.objects.filter(pk__in=ids).delete()
+
+        return len(ids)
+
+    def record_interest(self, item_id, name, email, location):
+        """Upsert the buyer by email and link it to the item, returning the seller's id, or None if the item does not exist.
+
+        The item's interest count only grows when the link is new. Items linked to
+        the buyer are touched since the buyer details they show may have changed.
+        """
+        email = self.model.buyers.field.related_model.objects.normalize_email(email)
+
+        if connections[self.db].vendor == 'postgresql':
+            return self._record_interest_postgresql(item_id, name, email, location)
+
+        return self._record_interest(item_id, name, email, location)
+
+    def _record_interest_postgresql(self, item_id, name, email, location):
+        """Single round-trip upsert using data-modifying CTEs"""
+        through = self.model.buyers.through
+        buyer_model = self.model.buyers.field.related_model
+        sql = """
+            WITH buyer AS (
+                INSERT INTO {buyer} (id, name, email, location)
+                SELECT %s, %s, %s, %s WHERE EXISTS (SELECT 1 FROM {item} WHERE id = %s)
+                ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name, location = EXCLUDED.location
+                RETURNING id
+            ), link AS (
+                INSERT INTO {through} (item_id, buyer_id)
+                SELECT %s, id FROM buyer
+                ON CONFLICT (item_id, buyer_id) DO NOTHING
+                RETURNING item_id
+            )
+            UPDATE {item}
+            SET updated_at = %s, interest_count = interest_count + CASE WHEN id = %s THEN (SELECT COUNT(*) FROM link) ELSE 0 END
+            WHERE id = %s OR id IN (SELECT item_id FROM {through} WHERE buyer_id IN (SELECT id FROM buyer))
+            RETURNING id, {user}
+        """.format(
+            buyer=buyer_model._meta.db_table,
+            item=self.model._meta.db_table,
+            through=through._meta.db_table,
+            user=self.model._meta.get_field('user').column,
+        )
+        params = [uid(), name, email, location, item_id, item_id, timezone.now(), item_id, item_id]
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            touched = {str(id): user_id for id, user_id in cursor.fetchall()}
+
+        return touched.get(str(item_id))
+
+    def _record_interest(self, item_id, name, email, location):
+        through = self.model.buyers.through
+        buyer_model = self.model.buyers.field.related_model
+
+        with transaction.atomic(using=self.db):
+            seller = self.model.objects.filter(pk=item_id).values_list('user_id', flat=True).first()
+            if seller is None:
+                return None
+
+            buyer, _ = buyer_model.objects.update_or_create(email=email, defaults={'name': name, 'location': location})
+            _, linked = through.objects.get_or_create(item_id=item_id, buyer_id=buyer.pk)
+            self.model.objects.filter(models.Q(pk=item_id) | models.Q(buyers=buyer)).update(
+                updated_at=timezone.now(),
+                interest_count=models.Case(
+                    models.When(pk=item_id, then=models.F('interest_count') + int(linked)),
+                    default=models.F('interest_count'),
+                ),
+            )
+
+        return seller
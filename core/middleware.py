@@ -0,0 +1,113 @@
+import asyncio
+import random
+import re
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.compression import compress_response
+from core.db.routers import read_replica
+
+
+PIN_COOKIE = 'db_pin'
+
+
+def pin_cache():
+    return caches[settings.REPLICA_PIN_CACHE]
+
+
+def pin_key(credentials):
+    """Token clients may not keep cookies, so they are pinned by their credentials as well"""
+    return 'db:pin:%s' % md5(credentials.encode('utf-8')).hexdigest()
+
+
+def pin_credentials(credentials):
+    """Read requests sent with this Authorization header from the primary for REPLICA_PIN_SECONDS"""
+    pin_cache().set(pin_key(credentials), True, settings.REPLICA_PIN_SECONDS)
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Let safe requests to the replica views read from one replica unless the client wrote recently"""
+
+    def process_request(self, request):
+        read_replica.set(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.REPLICA_DATABASES or request.method not in SAFE_METHODS:
+            return None
+
+        if view_func.__module__ in settings.REPLICA_VIEW_MODULES and not self.pinned(request):
+            # Chosen once, every read of the request sees the same replica
+            read_replica.set(random.choice(settings.REPLICA_DATABASES))
+
+        return None
+
+    def process_response(self, request, response):
+        read_replica.set(None)
+
+        if settings.REPLICA_DATABASES and request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(request, response)
+
+        return response
+
+    def pin(self, request, response):
+        """Read this client's requests from the primary until the replicas have caught up"""
+        response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        if credentials:
+            pin_credentials(credentials)
+
+    def pinned(self, request):
+        if PIN_COOKIE in request.COOKIES:
+            return True
+
+        credentials = request.META.get('HTTP_AUTHORIZATION')
+        return bool(credentials) and pin_cache().get(pin_key(credentials)) is not None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress API responses with the best coding the client accepts"""
+
+    def process_response(self, request, response):
+        compress_response(request, response)
+
+        # The bytes differ from the identity encoding, so the ETag can only be a weak one
+        if response.has_header('Content-Encoding') and response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also runs in async mode, so coroutine views behind it are not pinned to one thread.
+
+    Looking a request up among the static files is a dictionary lookup unless
+    autorefresh is on, which is only the case under DEBUG.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        if asyncio.iscoroutinefunction(get_response):
+            # Marks the instance as a coroutine function to Django, as MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+
+        return response
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from core import search
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        search.install_postgresql_search(schema_editor, apps.get_model('core', 'Item'))
+    elif vendor == 'sqlite':
+        search.install_sqlite_search(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        search.uninstall_postgresql_search(schema_editor, apps.get_model('core', 'Item'))
+    elif vendor == 'sqlite':
+        search.uninstall_sqlite_search(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_item_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+def merge_duplicate_buyers(apps, schema_editor):
+    """Normalize buyer emails and fold buyers sharing an email into the first one"""
+    Buyer = apps.get_model('core', 'Buyer')
+    Link = apps.get_model('core', 'Item').buyers.through
+
+    kept = {}
+    for buyer in Buyer.objects.order_by('email', 'id').iterator():
+        email = buyer.email.strip().lower()
+
+        if email not in kept:
+            kept[email] = buyer.pk
+            if buyer.email != email:
+                Buyer.objects.filter(pk=buyer.pk).update(email=email)
+            continue
+
+        linked = Link.objects.filter(buyer_id=kept[email]).values_list('item_id', flat=True)
+        Link.objects.filter(buyer_id=buyer.pk).exclude(item_id__in=list(linked)).update(buyer_id=kept[email])
+        Link.objects.filter(buyer_id=buyer.pk).delete()
+        Buyer.objects.filter(pk=buyer.pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_item_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_buyers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='buyer',
+            name='email',
+            field=models.EmailField(max_length=255, unique=True),
+        ),
+    ]
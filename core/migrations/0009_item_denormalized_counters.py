@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    """Copy each seller's state onto their items and count the buyers of every item"""
+    Item = apps.get_model('core', 'Item')
+    Profile = apps.get_model('core', 'Profile')
+    Link = Item.buyers.through
+
+    state = Profile.objects.filter(user_id=OuterRef('user_id')).values('state_of_residence')[:1]
+    count = Link.objects.filter(item_id=OuterRef('pk')).order_by().values('item_id').annotate(count=Count('*')).values('count')
+
+    Item.objects.update(
+        seller_state=Coalesce(Subquery(state), Value('')),
+        interest_count=Coalesce(Subquery(count), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_buyer_email_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='interest_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='seller_state',
+            field=models.CharField(blank=True, choices=[('FC', 'Abuja'), ('AB', 'Abia'), ('AD', 'Adamawa'), ('AK', 'Akwa Ibom'), ('AN', 'Anambra'), ('BA', 'Bauchi'), ('BY', 'Bayelsa'), ('BE', 'Benue'), ('BO', 'Borno'), ('CR', 'Cross River'), ('DE', 'Delta'), ('EB', 'Ebonyi'), ('ED', 'Edo'), ('EK', 'Ekiti'), ('EN', 'Enugu'), ('GO', 'Gombe'), ('IM', 'Imo'), ('JI', 'Jigawa'), ('KD', 'Kaduna'), ('KN', 'Kano'), ('KT', 'Katsina'), ('KE', 'Kebbi'), ('KO', 'Kogi'), ('KW', 'Kwara'), ('LA', 'Lagos'), ('NA', 'Nassarawa'), ('NI', 'Niger'), ('OG', 'Ogun'), ('ON', 'Ondo'), ('OS', 'Osun'), ('OY', 'Oyo'), ('PL', 'Plateau'), ('RI', 'Rivers'), ('SO', 'Sokoto'), ('TA', 'Taraba'), ('YO', 'Yobe'), ('ZA', 'Zamfara')], default='', max_length=2),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['seller_state', '-created_at', '-id'], name='core_item_state_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['-interest_count', '-created_at', '-id'], name='core_item_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('is_sold', False)), fields=['seller_state', '-interest_count', '-created_at', '-id'], name='core_item_state_popular_idx'),
+        ),
+    ]
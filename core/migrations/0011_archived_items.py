@@ -0,0 +1,50 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:43
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+
+
+def populate_sold_at(apps, schema_editor):
+    """Items sold before sold_at existed take their last change as the time of sale"""
+    Item = apps.get_model('core', 'Item')
+    Item.objects.filter(is_sold=True, sold_at__isnull=True).update(sold_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_task'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='sold_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_sold_at, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ArchivedItem',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.IntegerField()),
+                ('description', models.TextField()),
+                ('url', models.CharField(max_length=255)),
+                ('created_at', models.DateField()),
+                ('updated_at', models.DateTimeField()),
+                ('sold_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('seller_state', models.CharField(blank=True, choices=[('FC', 'Abuja'), ('AB', 'Abia'), ('AD', 'Adamawa'), ('AK', 'Akwa Ibom'), ('AN', 'Anambra'), ('BA', 'Bauchi'), ('BY', 'Bayelsa'), ('BE', 'Benue'), ('BO', 'Borno'), ('CR', 'Cross River'), ('DE', 'Delta'), ('EB', 'Ebonyi'), ('ED', 'Edo'), ('EK', 'Ekiti'), ('EN', 'Enugu'), ('GO', 'Gombe'), ('IM', 'Imo'), ('JI', 'Jigawa'), ('KD', 'Kaduna'), ('KN', 'Kano'), ('KT', 'Katsina'), ('KE', 'Kebbi'), ('KO', 'Kogi'), ('KW', 'Kwara'), ('LA', 'Lagos'), ('NA', 'Nassarawa'), ('NI', 'Niger'), ('OG', 'Ogun'), ('ON', 'Ondo'), ('OS', 'Osun'), ('OY', 'Oyo'), ('PL', 'Plateau'), ('RI', 'Rivers'), ('SO', 'Sokoto'), ('TA', 'Taraba'), ('YO', 'Yobe'), ('ZA', 'Zamfara')], default='', max_length=2)),
+                ('interest_count', models.PositiveIntegerField(default=0)),
+                ('buyers', models.ManyToManyField(blank=True, related_name='archived_items', to='core.Buyer')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archiveditem',
+            index=models.Index(fields=['user', '-created_at'], name='core_archiveditem_user_idx'),
+        ),
+    ]
@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+from django.contrib.auth import hashers
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 
 from uuid import uuid4 as uid
 
-from core.managers import UserManager
+from core import hashers as pooled_hashers
+from core.managers import BuyerManager, ItemQuerySet, ListingQuerySet, ProfileManager, UserManager
 from utils.states import STATE_CHOICES
 
 
@@ -18,6 +22,32 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = 'email'
 
+    def set_password(self, raw_password):
+        """Hash the password within the process's hashing limit"""
+        self.password = pooled_hashers.run(hashers.make_password, raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """Verify the password within the hashing limit, upgrading a hash made with an older policy"""
+        cache_key = None
+        if settings.LOGIN_CACHE_TIMEOUT and raw_password is not None:
+            cache_key = pooled_hashers.login_cache_key(raw_password, self.password)
+            if pooled_hashers.verified_logins.get(cache_key):
+                return True
+
+        # Rehashed once the check has given its slot back, so a login never holds two slots
+        outdated = []
+        valid = pooled_hashers.run(hashers.check_password, raw_password, self.password, outdated.append)
+
+        if valid and outdated:
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+        elif valid and cache_key is not None:
+            pooled_hashers.verified_logins.set(cache_key, True)
+
+        return valid
+
 
 class Profile(models.Model):
     """User profile model to extend user"""
@@ -26,6 +56,8 @@ class Profile(models.Model):
     last_name = models.CharField(max_length=255)
     state_of_residence = models.CharField(max_length=2, choices=STATE_CHOICES)
 
+    objects = ProfileManager()
+
     def __str__(self):
         return self.user.email
 
@@ -33,9 +65,11 @@ class Profile(models.Model):
 class Buyer(models.Model):
     id = models.UUIDField(primary_key=True, default=uid, editable=False)
     name = models.CharField(max_length=255)
-    email = models.EmailField(max_length=255)
+    email = models.EmailField(max_length=255, unique=True)
     location = models.CharField(max_length=255)
 
+    objects = BuyerManager()
+
     def __str__(self):
         return self.name
 
@@ -49,8 +83,94 @@ class Item(models.Model):
     description = models.TextField()
     url = models.CharField(max_length=255)
     created_at = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_sold = models.BooleanField(default=False)
+    sold_at = models.DateTimeField(null=True, blank=True)
     buyers = models.ManyToManyField(Buyer, blank=True)
+    seller_state = models.CharField(max_length=2, choices=STATE_CHOICES, blank=True, default='')
+    interest_count = models.PositiveIntegerField(default=0)
+
+    objects = ItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='core_item_feed_idx', condition=models.Q(is_sold=False)),
+            models.Index(fields=['user', '-created_at'], name='core_item_user_created_idx'),
+            models.Index(fields=['seller_state', '-created_at', '-id'], name='core_item_state_idx', condition=models.Q(is_sold=False)),
+            models.Index(fields=['-interest_count', '-created_at', '-id'], name='core_item_popular_idx', condition=models.Q(is_sold=False)),
+            models.Index(
+                fields=['seller_state', '-interest_count', '-created_at', '-id'],
+                name='core_item_state_popular_idx',
+                condition=models.Q(is_sold=False)
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.seller_state:
+            self.seller_state = Profile.objects.state_of(self.user_id)
+        if self.is_sold and self.sold_at is None:
+            self.sold_at = timezone.now()
+
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedItem(models.Model):
+    """Item sold long enough ago to be moved out of the item table by the archive_sold_items command"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+    price = models.IntegerField()
+    description = models.TextField()
+    url = models.CharField(max_length=255)
+    created_at = models.DateField()
+    updated_at = models.DateTimeField()
+    sold_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    buyers = models.ManyToManyField(Buyer, blank=True, related_name='archived_items')
+    seller_state = models.CharField(max_length=2, choices=STATE_CHOICES, blank=True, default='')
+    interest_count = models.PositiveIntegerField(default=0)
+
+    objects = ListingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='core_archiveditem_user_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Task(models.Model):
+    """Background job stored in the database and run by the run_worker command"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uid, editable=False)
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    batch_key = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_at = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='core_task_ready_idx'),
+            models.Index(fields=['name', 'batch_key'], name='core_task_batch_idx', condition=models.Q(status='pending')),
+        ]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,137 @@
+"""A small task queue kept in the database, so it needs no broker.
+
+Tasks are rows of core.models.Task, so a view that enqueues inside the
+transaction.atomic() block of the write that caused them stores both or
+neither. Workers (python manage.py run_worker) claim due rows with
+SELECT ... FOR UPDATE SKIP LOCKED on Postgres, so several workers never run
+the same task. When a task with a batch key is due, the pending tasks of its
+batch that were never tried are claimed with it, whatever their own run_at,
+and handed to the handler as one list. That is how interest notifications are
+grouped per seller over the delay of the first one. Failed tasks are retried
+with exponential backoff, a worker that died mid task loses its lease after
+QUEUE_LEASE_SECONDS.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import Task
+
+
+logger = logging.getLogger(__name__)
+
+handlers = {}
+
+
+def task(name):
+    """Register a handler, called with the list of payloads of a claimed batch"""
+    def register(handler):
+        handlers[name] = handler
+        return handler
+
+    return register
+
+
+def enqueue(name, payload, batch_key='', delay=0):
+    """Store a task to run after delay seconds, tasks with the same name and batch key run together"""
+    if name not in handlers:
+        raise KeyError('No handler registered for task %s' % name)
+
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        batch_key=batch_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def enqueue_many(name, tasks, delay=0):
+    """Store several tasks in one insert, tasks holds (payload, batch_key) pairs"""
+    if name not in handlers:
+        raise KeyError('No handler registered for task %s' % name)
+
+    run_at = timezone.now() + timedelta(seconds=delay)
+    return Task.objects.bulk_create([
+        Task(name=name, payload=payload, batch_key=batch_key, run_at=run_at) for payload, batch_key in tasks
+    ])
+
+
+def due(now):
+    expired = now - timedelta(seconds=settings.QUEUE_LEASE_SECONDS)
+    return Q(status=Task.PENDING, run_at__lte=now) | Q(status=Task.RUNNING, locked_at__lt=expired)
+
+
+def claim(limit):
+    """Lease up to limit due tasks, plus the rest of their batches, and group them by batch"""
+    now = timezone.now()
+    with transaction.atomic():
+        ready = Task.objects.select_for_update(skip_locked=True).filter(due(now))
+        tasks = list(ready.order_by('run_at')[:limit])
+
+        batches = {(task.name, task.batch_key) for task in tasks if task.batch_key}
+        if batches:
+            siblings = Q()
+            for name, batch_key in batches:
+                siblings |= Q(name=name, batch_key=batch_key)
+            # Siblings waiting on a retry keep their backoff, the others join the batch early
+            pending = Task.objects.select_for_update(skip_locked=True).filter(due(now) | Q(status=Task.PENDING, attempts=0))
+            tasks += list(pending.filter(siblings).exclude(pk__in=[task.pk for task in tasks]))
+
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            status=Task.RUNNING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+
+    groups = {}
+    for task in tasks:
+        task.attempts += 1
+        groups.setdefault((task.name, task.batch_key or task.pk), []).append(task)
+
+    return list(groups.values())
+
+
+def backoff(attempts):
+    """Seconds to wait before the next attempt, doubling each time with some jitter"""
+    delay = min(settings.QUEUE_BACKOFF_SECONDS * 2 ** (attempts - 1), settings.QUEUE_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run(tasks):
+    """Run one claimed batch, deleting it on success and scheduling a retry on failure"""
+    pks = [task.pk for task in tasks]
+    try:
+        handlers[tasks[0].name]([task.payload for task in tasks])
+    except Exception as exc:
+        logger.exception('Task %s failed', tasks[0].name)
+        fail(tasks, exc)
+        return False
+
+    Task.objects.filter(pk__in=pks).delete()
+    return True
+
+
+def fail(tasks, exc):
+    now = timezone.now()
+    for task in tasks:
+        if task.attempts >= settings.QUEUE_MAX_ATTEMPTS:
+            changes = {'status': Task.FAILED}
+        else:
+            changes = {'status': Task.PENDING, 'run_at': now + timedelta(seconds=backoff(task.attempts))}
+
+        Task.objects.filter(pk=task.pk).update(locked_at=None, last_error=repr(exc), **changes)
+
+
+def work(limit=None):
+    """Claim and run one round of due tasks, returning how many tasks ran"""
+    count = 0
+    for tasks in claim(limit or settings.QUEUE_BATCH_SIZE):
+        run(tasks)
+        count += len(tasks)
+
+    return count
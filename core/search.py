@@ -0,0 +1,91 @@
+"""Full-text search over item names and descriptions.
+
+Postgres matches against a GIN indexed tsvector expression. SQLite keeps an
+external content FTS5 table in sync with core_item through triggers, so rows
+written with bulk_create or queryset updates are indexed as well.
+"""
+
+SEARCH_CONFIG = 'english'
+SEARCH_INDEX = 'core_item_search_idx'
+FTS_TABLE = 'core_item_fts'
+
+SQLITE_FTS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS core_item_fts
+USING fts5(name, description, content='core_item')
+"""
+
+SQLITE_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS core_item_fts_insert AFTER INSERT ON core_item BEGIN
+        INSERT INTO core_item_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_item_fts_delete AFTER DELETE ON core_item BEGIN
+        INSERT INTO core_item_fts (core_item_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS core_item_fts_update AFTER UPDATE OF name, description ON core_item BEGIN
+        INSERT INTO core_item_fts (core_item_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO core_item_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END
+    """,
+)
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('name', 'description', config=SEARCH_CONFIG)
+
+
+def install_postgresql_search(schema_editor, model):
+    from django.contrib.postgres.indexes import GinIndex
+
+    schema_editor.add_index(model, GinIndex(search_vector(), name=SEARCH_INDEX))
+
+
+def uninstall_postgresql_search(schema_editor, model):
+    from django.contrib.postgres.indexes import GinIndex
+
+    schema_editor.remove_index(model, GinIndex(search_vector(), name=SEARCH_INDEX))
+
+
+def install_sqlite_search(connection):
+    """Create the FTS5 table and its triggers, rebuilding the index if they were missing.
+
+    SQLite migrations that remake core_item drop its triggers and renumber its
+    rowids, so this also runs after every migrate.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'core_item_fts_%'")
+        installed = cursor.fetchone()[0] == len(SQLITE_FTS_TRIGGERS)
+
+        cursor.execute(SQLITE_FTS_TABLE)
+        for trigger in SQLITE_FTS_TRIGGERS:
+            cursor.execute(trigger)
+
+        if not installed:
+            cursor.execute("INSERT INTO core_item_fts (core_item_fts) VALUES ('rebuild')")
+
+
+def sync_sqlite_search(using, **kwargs):
+    """post_migrate receiver restoring the FTS5 triggers after core_item was remade"""
+    from django.db import connections
+
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and 'core_item' in connection.introspection.table_names():
+        install_sqlite_search(connection)
+
+
+def uninstall_sqlite_search(connection):
+    with connection.cursor() as cursor:
+        for name in ('insert', 'delete', 'update'):
+            cursor.execute('DROP TRIGGER IF EXISTS core_item_fts_%s' % name)
+        cursor.execute('DROP TABLE IF EXISTS core_item_fts')
+
+
+def sqlite_match_expression(query):
+    """Quote every term so user input is matched literally, all terms required"""
+    return ' '.join('"%s"' % term.replace('"', '""') for term in query.split())
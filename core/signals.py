@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_tokens
+from core.models import User
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Read now, the delete clears the primary key on the instance. Evicting before the commit
+    # would let a concurrent request cache the token again while the delete is not visible
+    keys = [instance.key]
+    transaction.on_commit(lambda: invalidate_tokens(keys))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Evict cached tokens once the save commits, so deactivation and other changes apply on the next request"""
+    if not created:
+        keys = list(Token.objects.filter(user=instance).values_list('key', flat=True))
+        transaction.on_commit(lambda: invalidate_tokens(keys))
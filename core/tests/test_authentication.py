@@ -0,0 +1,132 @@
+import time
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.authentication import LocalTTLCache, local_tokens, token_cache_key
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test the cached token authentication class"""
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_token_resolved_from_cache(self):
+        """Test only the first request with a token queries the database"""
+        with self.assertNumQueries(1):
+            self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_token_resolved_from_shared_cache(self):
+        """Test a process with an empty local cache uses the shared cache"""
+        self.client.get(ME_URL)
+        local_tokens.clear()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_invalid_token(self):
+        """Test an unknown token is rejected"""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_invalidated(self):
+        """Test a deleted token stops authenticating immediately"""
+        self.client.get(ME_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_invalidated(self):
+        """Test a deactivated user's token stops authenticating immediately"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_update_invalidated(self):
+        """Test changes to the user are seen on the next request"""
+        self.client.get(ME_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, {'email': 'updated@c2c.com'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], 'updated@c2c.com')
+
+    def test_evicted_after_commit(self):
+        """Test the cached user is evicted when the deactivation commits, not before"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.save()
+        self.assertIsNotNone(cache.get(token_cache_key(self.token.key)))
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(ME_URL).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_hash_not_cached(self):
+        """Test the shared cache holds no password hash, and updates through the cached user keep the password"""
+        self.client.get(ME_URL)
+
+        self.assertNotIn(self.user.password, repr(cache.get(token_cache_key(self.token.key))))
+
+        self.client.patch(ME_URL, {'email': 'updated@c2c.com'})
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpassword'))
+
+
+class LocalTTLCacheTests(TestCase):
+    """Test the in-process LRU cache"""
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays within its size, dropping the oldest entry"""
+        lru = LocalTTLCache(maxsize=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Test entries are dropped once their timeout passes"""
+        lru = LocalTTLCache(maxsize=2, timeout=0.01)
+        lru.set('a', 1)
+        time.sleep(0.02)
+
+        self.assertIsNone(lru.get('a'))
@@ -0,0 +1,89 @@
+import gzip
+from unittest import mock
+
+import brotli
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import compression
+from core.middleware import CompressionMiddleware
+
+
+BODY = b'{"results": [%s]}' % b','.join([b'{"name": "Item"}'] * 200)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test API responses are compressed with the coding the client prefers"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get_response(self, accept_encoding, response):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, content=BODY):
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = '"version"'
+        return response
+
+    def test_brotli_preferred(self):
+        """Test brotli is used when the client accepts it"""
+        res = self.get_response('gzip, deflate, br', self.json_response())
+
+        self.assertEqual(res['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(res.content), BODY)
+        self.assertEqual(res['Content-Length'], str(len(res.content)))
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+        self.assertEqual(res['ETag'], 'W/"version"')
+
+    def test_gzip(self):
+        """Test gzip is used when the client does not accept brotli"""
+        res = self.get_response('gzip, br;q=0', self.json_response())
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), BODY)
+
+    def test_quality_values(self):
+        """Test the coding with the higher quality value wins"""
+        res = self.get_response('br;q=0.5, gzip;q=0.8', self.json_response())
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+
+        res = self.get_response('*', self.json_response())
+        self.assertEqual(res['Content-Encoding'], 'br')
+
+    def test_gzip_without_brotli(self):
+        """Test gzip is used when the brotli package is not installed"""
+        with mock.patch.object(compression, 'brotli', None):
+            res = self.get_response('br, gzip', self.json_response())
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+
+    def test_identity(self):
+        """Test the response is unchanged when the client accepts no supported coding"""
+        for accept_encoding in ('', 'deflate', 'gzip;q=0, br;q=0'):
+            res = self.get_response(accept_encoding, self.json_response())
+
+            self.assertFalse(res.has_header('Content-Encoding'))
+            self.assertEqual(res.content, BODY)
+            self.assertEqual(res['Vary'], 'Accept-Encoding')
+            self.assertEqual(res['ETag'], '"version"')
+
+    def test_small_response(self):
+        """Test bodies under COMPRESSION_MIN_SIZE are sent as they are"""
+        res = self.get_response('br, gzip', self.json_response(b'{"detail": "Not found."}'))
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+    def test_other_responses(self):
+        """Test other content types, streamed and already encoded bodies are left alone"""
+        res = self.get_response('gzip', HttpResponse(BODY, content_type='image/png'))
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+        res = self.get_response('gzip', StreamingHttpResponse([BODY], content_type='application/json'))
+        self.assertFalse(res.has_header('Content-Encoding'))
+
+        response = self.json_response(gzip.compress(BODY))
+        response['Content-Encoding'] = 'gzip'
+        res = self.get_response('br', response)
+        self.assertEqual(gzip.decompress(res.content), BODY)
@@ -0,0 +1,78 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from core.db.pool import ConnectionPool
+
+
+class FakeConnection:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test the process wide connection pool"""
+
+    def setUp(self):
+        self.pool = ConnectionPool(FakeConnection, lambda connection: True, max_size=2, max_lifetime=60)
+
+    def test_released_connection_reused(self):
+        """Test a released connection is handed out again instead of a new one"""
+        conn = self.pool.acquire()
+        self.pool.release(conn)
+
+        self.assertIs(self.pool.acquire(), conn)
+
+    def test_pool_keeps_at_most_max_size(self):
+        """Test connections released beyond the pool size are closed"""
+        pooled = [self.pool.acquire() for _ in range(3)]
+        for conn in pooled:
+            self.pool.release(conn)
+
+        self.assertEqual(len(self.pool.idle), 2)
+        self.assertTrue(pooled[2].closed)
+
+    def test_unusable_connection_discarded(self):
+        """Test connections the reset callback rejects or that were closed are not reused"""
+        pool = ConnectionPool(FakeConnection, lambda connection: False, max_size=2)
+        rejected = pool.acquire()
+        pool.release(rejected)
+
+        closed = self.pool.acquire()
+        closed.close()
+        self.pool.release(closed)
+
+        self.assertTrue(rejected.closed)
+        self.assertEqual(pool.idle, [])
+        self.assertEqual(self.pool.idle, [])
+
+    def test_expired_connection_replaced(self):
+        """Test connections older than the maximum lifetime are closed on acquire"""
+        with mock.patch('core.db.pool.time.monotonic', return_value=0):
+            conn = self.pool.acquire()
+            self.pool.release(conn)
+
+        with mock.patch('core.db.pool.time.monotonic', return_value=61):
+            fresh = self.pool.acquire()
+
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+
+
+@skipUnless(connection.settings_dict.get('CONN_HEALTH_CHECKS'), 'Postgres backend with health checks')
+class HealthCheckTests(TestCase):
+    """Test the Postgres backend reconnects when the server dropped an idle connection"""
+
+    def test_health_check_once_per_request(self):
+        """Test the connection is checked before the first query of a request only"""
+        connection.ensure_connection()
+        connection.health_check_done = False
+
+        with mock.patch.object(connection, 'is_usable', return_value=True) as is_usable:
+            connection.cursor().close()
+            connection.cursor().close()
+
+        self.assertEqual(is_usable.call_count, 1)
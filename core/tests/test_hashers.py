@@ -0,0 +1,103 @@
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import hashers
+from django.test import TestCase, override_settings
+
+from core import hashers as pooled_hashers
+
+
+class PasswordHashingTests(TestCase):
+    """Test the hashing policy, its rehash on login and the hashing limit"""
+
+    def test_argon2_by_default(self):
+        """Test new passwords are hashed with the tuned Argon2 costs"""
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+
+        self.assertTrue(user.password.startswith('argon2$argon2id$v=19$m=19456,t=2,p=1$'))
+        self.assertTrue(user.check_password('testpassword'))
+        self.assertFalse(user.check_password('wrongpassword'))
+
+    def test_rehash_on_login(self):
+        """Test a hash from an older policy is replaced on the next successful login"""
+        with override_settings(PASSWORD_HASHERS=settings.PASSWORD_HASHER_PROFILES['pbkdf2'], PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        self.assertIsNone(authenticate(username='test@c2c.com', password='wrongpassword'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+        self.assertEqual(authenticate(username='test@c2c.com', password='testpassword'), user)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2$'))
+        self.assertTrue(user.check_password('testpassword'))
+
+    def test_rehash_on_new_costs(self):
+        """Test raising the costs of the same hasher rehashes on login"""
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+
+        with override_settings(PASSWORD_ARGON2_TIME_COST=3):
+            authenticate(username='test@c2c.com', password='testpassword')
+
+        user.refresh_from_db()
+        self.assertIn(',t=3,', user.password)
+
+    @override_settings(PASSWORD_HASHING_THREADS=2)
+    def test_hashing_holds_a_slot(self):
+        """Test hashing and verification run on the calling thread while holding a hashing slot"""
+        pooled_hashers.shutdown_pool()
+        self.addCleanup(pooled_hashers.shutdown_pool)
+        calls = []
+
+        def record(func):
+            def wrapper(*args):
+                calls.append((threading.current_thread(), pooled_hashers.hashing_slots()._value))
+                return func(*args)
+            return wrapper
+
+        with mock.patch.object(hashers, 'make_password', record(hashers.make_password)), \
+                mock.patch.object(hashers, 'check_password', record(hashers.check_password)):
+            user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+            user.check_password('testpassword')
+
+        self.assertEqual(calls, [(threading.current_thread(), 1)] * 2)
+        self.assertEqual(pooled_hashers.hashing_slots()._value, 2)
+
+
+@override_settings(LOGIN_CACHE_TIMEOUT=60)
+class LoginCacheTests(TestCase):
+    """Test successful password checks are remembered until the password changes"""
+
+    def setUp(self):
+        pooled_hashers.verified_logins.clear()
+        patcher = mock.patch.object(pooled_hashers.verified_logins, 'timeout', 60)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+
+    def test_repeated_login_skips_hashing(self):
+        """Test a second check of the same password does not hash again"""
+        self.assertTrue(self.user.check_password('testpassword'))
+
+        with mock.patch.object(pooled_hashers, 'run') as run:
+            self.assertTrue(self.user.check_password('testpassword'))
+
+        run.assert_not_called()
+
+    def test_failures_not_cached(self):
+        """Test wrong passwords are checked every time"""
+        self.user.check_password('testpassword')
+        self.assertFalse(self.user.check_password('wrongpassword'))
+        self.assertFalse(self.user.check_password('wrongpassword'))
+
+    def test_password_change(self):
+        """Test the old password no longer passes once it has changed"""
+        self.assertTrue(self.user.check_password('testpassword'))
+
+        self.user.set_password('newpassword')
+
+        self.assertFalse(self.user.check_password('testpassword'))
+        self.assertTrue(self.user.check_password('newpassword'))
@@ -1,5 +1,7 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from core import models
 
@@ -35,13 +37,15 @@ class UserModelTests(TestCase):
 
     def test_create_new_superuser(self):
         """Test creating new superuser"""
-        user = get_user_model().objects.create_superuser(
-            'test@c2c.com',
-            'testpassword'
-        )
+        with CaptureQueriesContext(connection) as queries:
+            user = get_user_model().objects.create_superuser(
+                'test@c2c.com',
+                'testpassword'
+            )
 
         self.assertTrue(user.is_superuser)
         self.assertTrue(user.is_staff)
+        self.assertEqual(len(queries), 1)
 
 
 class ProfileModelTests(TestCase):
@@ -77,6 +81,29 @@ class ItemModelTests(TestCase):
         self.assertEqual(str(item), item.name)
 
 
+class ItemIndexTests(TestCase):
+    """Test the query planner uses the item indexes for the hot queries"""
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                # The test tables are empty, make the planner prefer ordered index scans as it does on real data
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_bitmapscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+
+    def test_feed_uses_partial_index(self):
+        """Test the public feed query reads the unsold items index in order"""
+        plan = models.Item.objects.filter(is_sold=False).order_by('-created_at', '-id')[:20].explain()
+        self.assertIn('core_item_feed_idx', plan)
+
+    def test_owner_listing_uses_composite_index(self):
+        """Test the seller listing query searches the user and date index"""
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        plan = models.Item.objects.filter(user=user).order_by('-created_at').explain()
+        self.assertIn('core_item_user_created_idx', plan)
+
+
 class BuyerModelTests(TestCase):
     """Test class for the Buyer model"""
 
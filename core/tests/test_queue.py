@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import queue
+from core.models import Task
+
+
+calls = []
+
+
+@queue.task('test.record')
+def record(payloads):
+    calls.append(payloads)
+
+
+@queue.task('test.fail')
+def fail(payloads):
+    raise RuntimeError('boom')
+
+
+@override_settings(QUEUE_MAX_ATTEMPTS=2, QUEUE_BACKOFF_SECONDS=10, QUEUE_LEASE_SECONDS=60)
+class QueueTests(TestCase):
+    """Test the database backed task queue"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_unknown_task(self):
+        """Test tasks without a handler are rejected when enqueued"""
+        with self.assertRaises(KeyError):
+            queue.enqueue('test.unknown', {})
+
+    def test_task_runs_and_is_removed(self):
+        """Test a due task is run once and deleted"""
+        queue.enqueue('test.record', {'n': 1})
+
+        self.assertEqual(queue.work(), 1)
+        self.assertEqual(queue.work(), 0)
+        self.assertEqual(calls, [[{'n': 1}]])
+        self.assertFalse(Task.objects.exists())
+
+    def test_delayed_task_waits(self):
+        """Test a task does not run before its delay has passed"""
+        queue.enqueue('test.record', {'n': 1}, delay=60)
+
+        self.assertEqual(queue.work(), 0)
+        self.assertEqual(calls, [])
+
+    def test_batch_runs_together(self):
+        """Test tasks sharing a batch key reach the handler as one list"""
+        queue.enqueue('test.record', {'n': 1}, batch_key='seller:1')
+        queue.enqueue('test.record', {'n': 2}, batch_key='seller:1')
+        queue.enqueue('test.record', {'n': 3}, batch_key='seller:2')
+
+        queue.work(limit=1)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(payload['n'] for payload in calls[0]), [1, 2])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_batch_claims_siblings_not_yet_due(self):
+        """Test tasks enqueued within the delay of the first one join its batch"""
+        queue.enqueue('test.record', {'n': 1}, batch_key='seller:1', delay=60)
+        with mock.patch('core.queue.timezone.now', return_value=timezone.now() + timedelta(seconds=10)):
+            queue.enqueue('test.record', {'n': 2}, batch_key='seller:1', delay=60)
+
+        with mock.patch('core.queue.timezone.now', return_value=timezone.now() + timedelta(seconds=61)):
+            self.assertEqual(queue.work(), 2)
+
+        self.assertEqual(calls, [[{'n': 1}, {'n': 2}]])
+
+    def test_enqueue_many(self):
+        """Test tasks enqueued together keep their own batch keys"""
+        with self.assertNumQueries(1):
+            queue.enqueue_many('test.record', [({'n': 1}, 'item:1'), ({'n': 2}, 'item:2')])
+
+        queue.work()
+
+        self.assertEqual(sorted(len(payloads) for payloads in calls), [1, 1])
+        with self.assertRaises(KeyError):
+            queue.enqueue_many('test.unknown', [({}, '')])
+
+    def test_failed_task_retried_with_backoff(self):
+        """Test a failing task is rescheduled and finally marked as failed"""
+        task = queue.enqueue('test.fail', {})
+
+        with self.assertLogs('core.queue', 'ERROR'):
+            queue.work()
+        task.refresh_from_db()
+
+        self.assertEqual(task.status, Task.PENDING)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_at, timezone.now() + timedelta(seconds=7))
+        self.assertIn('boom', task.last_error)
+
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('core.queue', 'ERROR'):
+            queue.work()
+        task.refresh_from_db()
+
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(queue.work(), 0)
+
+    def test_expired_lease_reclaimed(self):
+        """Test a task left running by a dead worker is picked up again"""
+        task = queue.enqueue('test.record', {'n': 1})
+        Task.objects.filter(pk=task.pk).update(status=Task.RUNNING, locked_at=timezone.now() - timedelta(seconds=61))
+
+        self.assertEqual(queue.work(), 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_run_worker_once(self):
+        """Test the worker command drains the due tasks and exits"""
+        queue.enqueue('test.record', {'n': 1})
+        queue.enqueue('test.record', {'n': 2})
+        out = StringIO()
+
+        # The worker closes stale connections between rounds, which would end the test transaction
+        with mock.patch('core.management.commands.run_worker.signal.signal'), \
+                mock.patch('core.management.commands.run_worker.close_old_connections'):
+            call_command('run_worker', once=True, stdout=out)
+
+        self.assertEqual(len(calls), 2)
+        self.assertIn('Ran 2 tasks', out.getvalue())
@@ -0,0 +1,39 @@
+import datetime
+import decimal
+from unittest import mock
+from uuid import uuid4 as uid
+
+from django.test import SimpleTestCase
+
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from core.renderers import FastJSONRenderer
+
+
+DATA = {
+    'text': 'Lagos Abuja é',
+    'numbers': [1, 2.5, None, True],
+    'created': datetime.datetime(2020, 1, 1, 1, 2, 3, 456789, tzinfo=datetime.timezone.utc),
+    'day': datetime.date(2020, 1, 2),
+    'price': decimal.Decimal('1.50'),
+    'id': uid(),
+}
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer produces the same bytes as the DRF renderer"""
+
+    def test_same_output(self):
+        """Test compact output is identical, line separators escaped"""
+        self.assertEqual(FastJSONRenderer().render(DATA), JSONRenderer().render(DATA))
+
+    def test_indent_falls_back(self):
+        """Test pretty printed output is left to the DRF renderer"""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(FastJSONRenderer().render(DATA, media_type), JSONRenderer().render(DATA, media_type))
+
+    def test_without_orjson(self):
+        """Test the renderer works when orjson is not installed"""
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(FastJSONRenderer().render(DATA), JSONRenderer().render(DATA))
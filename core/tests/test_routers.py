@@ -0,0 +1,146 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db.routers import ReplicaRouter, read_replica
+from core.models import Item
+
+
+ITEMS_URL = reverse('item:collection')
+TOKEN_URL = reverse('user:token')
+INTEREST_URL = reverse('item:interest')
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the database router follows the replica decision of the request"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.addCleanup(read_replica.set, None)
+
+    def test_reads_use_default_outside_replica_requests(self):
+        """Test reads go to the default database unless the request allows replicas"""
+        self.assertIsNone(self.router.db_for_read(Item))
+
+    def test_reads_use_replica(self):
+        """Test reads of a replica request go to a replica"""
+        read_replica.set('replica')
+        self.assertEqual(self.router.db_for_read(Item), 'replica')
+
+    def test_writes_use_default(self):
+        """Test writes always go to the default database"""
+        read_replica.set('replica')
+        self.assertEqual(self.router.db_for_write(Item), 'default')
+
+    def test_replicas_not_migrated(self):
+        """Test migrations are never applied to replicas"""
+        self.assertFalse(self.router.allow_migrate('replica', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingMiddlewareTests(TransactionTestCase):
+    """Test safe item requests read from the replica unless the client wrote recently"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.item = Item.objects.create(
+            user=self.user,
+            name='Test Item',
+            price=5000,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+        # Long enough ago for the replicas to have the item
+        cache.clear()
+
+    def get(self, url, **extra):
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                res = self.client.get(url, **extra)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(primary), len(replica)
+
+    def test_feed_read_from_replica(self):
+        """Test the anonymous feed is read from the replica"""
+        primary, replica = self.get(ITEMS_URL)
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_replica_chosen_once_per_request(self):
+        """Test the replica is picked once for the request, not for every query"""
+        with mock.patch('core.middleware.random.choice', return_value='replica') as choice:
+            primary, replica = self.get(ITEMS_URL)
+
+        choice.assert_called_once_with(['replica'])
+        self.assertGreater(replica, 1)
+
+    def test_detail_read_from_replica(self):
+        """Test item details are read from the replica"""
+        primary, replica = self.get(reverse('item:resource', args=[self.item.id]))
+
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_reads_pinned_after_write(self):
+        """Test a client that just wrote reads its writes from the primary"""
+        res = self.client.post(INTEREST_URL, {'id': self.item.id, 'name': 'Buyer', 'email': 'buyer@c2c.com', 'location': 'Lagos'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        primary, replica = self.get(reverse('item:resource', args=[self.item.id]))
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_token_client_pinned_after_write(self):
+        """Test clients that do not keep cookies are pinned by their token"""
+        token = Token.objects.create(user=self.user)
+        credentials = {'HTTP_AUTHORIZATION': 'Token ' + token.key}
+        res = self.client.post(ITEMS_URL, {
+            'name': 'Another Item',
+            'price': 5000,
+            'description': 'Item description',
+            'url': 'c2c.com/static/item.jpg'
+        }, **credentials)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.client.cookies.clear()
+        primary, replica = self.get(ITEMS_URL, **credentials)
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_feed_read_from_primary_after_any_write(self):
+        """Test feed pages of a new version are not read from a replica that may lag behind the write"""
+        self.item.name = 'Renamed Item'
+        self.item.save()
+
+        primary, replica = self.get(ITEMS_URL)
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_new_token_pinned(self):
+        """Test a token is looked up on the primary right after it was issued"""
+        res = self.client.post(TOKEN_URL, {'email': 'test@c2c.com', 'password': 'testpassword'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.cookies.clear()
+        primary, replica = self.get(ITEMS_URL, HTTP_AUTHORIZATION='Token ' + res.data['token'])
+
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
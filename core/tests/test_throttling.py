@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from core.throttling import ClientRateThrottle, EmailRateThrottle
+
+
+RATES = {'test': '4/min', 'test_email': '2/min'}
+
+
+class ThrottledView(APIView):
+    throttle_scope = 'test'
+    throttle_email_scope = 'test_email'
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': RATES})
+class SlidingWindowThrottleTests(SimpleTestCase):
+    """Test the sliding window estimate over the shared cache counters"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.now = 6000.0
+
+    def allow(self, throttle_class=ClientRateThrottle, ip='10.0.0.1', view=ThrottledView, **data):
+        throttle = throttle_class()
+        throttle.timer = lambda: self.now
+        request = view().initialize_request(self.factory.post('/', data, format='json', REMOTE_ADDR=ip))
+        return throttle.allow_request(request, view()), throttle
+
+    def test_limit_per_client(self):
+        """Test requests over the rate are refused, per IP address"""
+        for _ in range(4):
+            self.assertTrue(self.allow()[0])
+
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 60)
+        self.assertTrue(self.allow(ip='10.0.0.2')[0])
+
+    def test_forwarded_for_ignored_without_proxies(self):
+        """Test clients cannot pick their own key through X-Forwarded-For unless a proxy sets it"""
+        def allow(forwarded):
+            throttle = ClientRateThrottle()
+            throttle.timer = lambda: self.now
+            request = ThrottledView().initialize_request(self.factory.post('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded))
+            return throttle.allow_request(request, ThrottledView())
+
+        with override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': RATES, 'NUM_PROXIES': 0}):
+            results = [allow('192.0.2.%d' % index) for index in range(5)]
+
+        self.assertEqual(results, [True] * 4 + [False])
+
+    def test_previous_window_weighted(self):
+        """Test the previous window counts for the part still inside the sliding window"""
+        self.now += 30
+        for _ in range(4):
+            self.allow()
+
+        # 50 of the previous window's 60 seconds still count, 4 * 50 / 60 leaves room for one
+        self.now += 40
+        self.assertTrue(self.allow()[0])
+
+        allowed, throttle = self.allow()
+        self.assertFalse(allowed)
+        self.assertEqual(throttle.wait(), 5)
+
+        self.now += 6
+        self.assertTrue(self.allow()[0])
+
+    def test_rejections_not_counted(self):
+        """Test refused requests do not push the limit further out"""
+        for _ in range(10):
+            self.allow()
+
+        self.now += 120
+        self.assertTrue(self.allow()[0])
+
+    def test_email_limit(self):
+        """Test requests naming the same email are limited across IP addresses"""
+        self.assertTrue(self.allow(EmailRateThrottle, ip='10.0.0.1', email='buyer@c2c.com')[0])
+        self.assertTrue(self.allow(EmailRateThrottle, ip='10.0.0.2', email='Buyer@c2c.com ')[0])
+        self.assertFalse(self.allow(EmailRateThrottle, ip='10.0.0.3', email='buyer@c2c.com')[0])
+        self.assertTrue(self.allow(EmailRateThrottle, email='other@c2c.com')[0])
+        self.assertTrue(self.allow(EmailRateThrottle)[0])
+
+    def test_views_without_scope(self):
+        """Test views that set no scope are not throttled"""
+        with mock.patch.object(ThrottledView, 'throttle_scope', None):
+            for _ in range(10):
+                self.assertTrue(self.allow()[0])
+
+    def test_unknown_scope(self):
+        """Test a scope without a configured rate is an error"""
+        with mock.patch.object(ThrottledView, 'throttle_scope', 'missing'), self.assertRaises(ImproperlyConfigured):
+            self.allow()
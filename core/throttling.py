@@ -0,0 +1,122 @@
+"""Rate limits kept as sliding window counters in a shared cache.
+
+Each client has a counter per fixed window of the rate's duration. A request
+is allowed while the current count plus the previous window's count, weighted
+by how much of the previous window still overlaps the sliding one, stays
+under the limit. That takes one get_many and one incr per request, whatever
+the rate, and rejections cost a single cache read. Views opt in with
+throttle_scope, and throttle_email_scope for EmailRateThrottle, naming rates
+in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+"""
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+def throttle_cache():
+    return caches[settings.THROTTLE_CACHE]
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Throttle by the sliding window estimate of a client's requests, the scope comes from the view"""
+    scope_attr = 'throttle_scope'
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)d'
+
+    def __init__(self):
+        # The rate depends on the view, it is looked up in allow_request
+        pass
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured("No default throttle rate set for '%s' scope" % self.scope)
+
+    def get_client(self, request, view):
+        """Identify the client the limit applies to, None leaves the request unthrottled"""
+        raise NotImplementedError('.get_client() must be overridden')
+
+    def window_key(self, client, window):
+        return self.cache_format % {'scope': self.scope, 'ident': client, 'window': window}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        client = self.get_client(request, view)
+        if client is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.elapsed = self.now - window * self.duration
+
+        cache = throttle_cache()
+        key, previous_key = self.window_key(client, window), self.window_key(client, window - 1)
+        counts = cache.get_many([key, previous_key])
+        self.current, self.previous = counts.get(key, 0), counts.get(previous_key, 0)
+
+        if self.estimate() >= self.num_requests:
+            return self.throttle_failure()
+
+        # A window's count is read until the end of the next one
+        if not cache.add(key, 1, self.duration * 2):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, self.duration * 2)
+
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def estimate(self):
+        overlap = (self.duration - self.elapsed) / self.duration
+        return self.previous * overlap + self.current
+
+    def wait(self):
+        """Seconds until the estimate drops below the limit, assuming no further requests"""
+        if not self.num_requests:
+            return None
+
+        if self.current < self.num_requests:
+            # Only the previous window's share has to shrink
+            needed = self.duration * (1 - (self.num_requests - self.current) / self.previous)
+            return max(needed - self.elapsed, 0)
+
+        # This window becomes the previous one and has to shrink in turn
+        return self.duration - self.elapsed + self.duration * (1 - self.num_requests / self.current)
+
+
+class ClientRateThrottle(SlidingWindowThrottle):
+    """Limit each authenticated user, or each IP address for anonymous requests"""
+
+    def get_client(self, request, view):
+        if request.user.is_authenticated:
+            return 'user:%s' % request.user.pk
+
+        return 'ip:%s' % self.get_ident(request)
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """Limit requests naming the same email in their payload, whoever sends them"""
+    scope_attr = 'throttle_email_scope'
+
+    def get_client(self, request, view):
+        email = getattr(request.data, 'get', lambda key: None)('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        return 'email:%s' % md5(email.strip().lower().encode('utf-8')).hexdigest()
@@ -0,0 +1,9 @@
+"""Gunicorn settings. Set WEB_ASGI=1 to serve the app through uvicorn workers instead of sync workers"""
+import os
+
+
+if os.environ.get('WEB_ASGI', '0') == '1':
+    wsgi_app = 'app.asgi'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app.wsgi'
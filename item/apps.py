@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ItemConfig(AppConfig):
     name = 'item'
+
+    def ready(self):
+        import item.signals  # noqa: F401
+        import item.tasks  # noqa: F401
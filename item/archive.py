@@ -0,0 +1,61 @@
+"""Sellers' listings including the items moved to the archive table.
+
+Archived items are serialized like live ones, by the fast path when it is
+on, and the two sorted lists are merged in the order the listing asked for.
+"""
+import heapq
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.models import ArchivedItem, Item
+from item.fastpath import fast_path_enabled, item_columns, serialize_items
+
+
+def merge_sorted(ordering, *listings):
+    """Merge (rows, data) listings each sorted by ordering, whose fields are all descending"""
+    names = [field.lstrip('-') for field in ordering]
+
+    def key(pair):
+        row = pair[0]
+        return tuple(row[name] if isinstance(row, dict) else getattr(row, name) for name in names)
+
+    return [data for row, data in heapq.merge(*[zip(rows, data) for rows, data in listings], key=key, reverse=True)]
+
+
+class ArchivedItemsMixin:
+    """Add the seller's archived items to their listing when asked with ?include_archived=1"""
+
+    def include_archived(self):
+        value = self.request.query_params.get('include_archived', '0')
+        if value not in ('0', '1'):
+            raise ValidationError({'include_archived': 'Please provide 0 or 1 for include_archived'})
+
+        return value == '1' and self.request.user.is_authenticated
+
+    def get_archived_queryset(self):
+        return ArchivedItem.objects.for_listing(self.get_columns()).filter(user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        if not self.include_archived():
+            return super().list(request, *args, **kwargs)
+
+        ordering = self.get_feed_ordering()
+        querysets = [
+            (self.filter_queryset(queryset).order_by(*ordering), model)
+            for queryset, model in ((self.get_queryset(), Item), (self.get_archived_queryset(), ArchivedItem))
+        ]
+
+        serializer_class = self.get_serializer_class()
+        listings = []
+        if fast_path_enabled(serializer_class):
+            fields = self.get_requested_fields() or serializer_class.Meta.fields
+            for queryset, model in querysets:
+                rows = list(queryset.prefetch_related(None).values(*item_columns(self.get_columns())))
+                listings.append((rows, serialize_items(rows, fields, model)))
+        else:
+            for queryset, model in querysets:
+                items = list(queryset)
+                listings.append((items, self.get_serializer(items, many=True).data))
+
+        return Response(merge_sorted(ordering, *listings))
@@ -0,0 +1,175 @@
+"""Versioned cache and conditional GET support for item responses.
+
+Every cached page is keyed by the global feed version, so bumping the version
+once an item write commits retires all pages at once without having to find
+them. The same version, or an item's updated_at, doubles as the ETag of the
+response.
+Pages are kept compressed as well, once per content coding clients ask for.
+For REPLICA_PIN_SECONDS after a bump pages are read from the primary, as a
+replica may not have the write yet.
+"""
+import time
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from rest_framework.response import Response
+
+from core.compression import compress_response, negotiate, set_encoded_content
+from core.db.routers import read_replica
+
+
+FEED_VERSION_KEY = 'item:feed:version'
+FEED_WRITTEN_KEY = 'item:feed:written'
+
+
+def feed_cache():
+    return caches[settings.ITEM_FEED_CACHE]
+
+
+def get_feed_version():
+    """Return the current feed version, starting a new one if it was evicted"""
+    cache = feed_cache()
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an old version
+        cache.add(FEED_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(FEED_VERSION_KEY)
+
+    return version
+
+
+def bump_feed_version():
+    """Retire every cached page once the current transaction commits, or now outside of one"""
+    # Bumping earlier would let a concurrent request cache the old rows under the new version
+    transaction.on_commit(_bump_feed_version)
+
+
+def _bump_feed_version():
+    cache = feed_cache()
+    if settings.REPLICA_DATABASES:
+        # Set before the new version exists, so no request sees the version without it
+        cache.set(FEED_WRITTEN_KEY, True, settings.REPLICA_PIN_SECONDS)
+
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        get_feed_version()
+
+
+def feed_page_key(request):
+    digest = md5('{} {}'.format(request.accepted_media_type, request.build_absolute_uri()).encode('utf-8')).hexdigest()
+    return 'item:feed:{}:{}'.format(get_feed_version(), digest)
+
+
+def make_etag(*parts):
+    return '"%s"' % md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def feed_etag(request):
+    user = request.user.pk if request.user.is_authenticated else ''
+    return make_etag(get_feed_version(), user, request.accepted_media_type, request.build_absolute_uri())
+
+
+def item_etag(request, pk, updated_at):
+    return make_etag(pk, updated_at.isoformat(), request.accepted_media_type)
+
+
+def etag_matches(request, etag):
+    """Compare against If-None-Match, which uses the weak comparison"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+
+    etags = parse_etags(header)
+    return '*' in etags or etag in [tag[2:] if tag.startswith('W/') else tag for tag in etags]
+
+
+def not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+class FeedCacheMixin:
+    """Answer list requests with 304 when unchanged and serve anonymous JSON pages from the feed cache"""
+
+    def list(self, request, *args, **kwargs):
+        return self.feed_response(super().list, request, *args, **kwargs)
+
+    def feed_response(self, handler, request, *args, **kwargs):
+        if read_replica.get() and feed_cache().get(FEED_WRITTEN_KEY):
+            # A lagging replica could miss the write behind the current version, and the
+            # page read now is cached and tagged with that version until the next write
+            read_replica.set(None)
+
+        etag = feed_etag(request)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        response = self.cached_response(handler, request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+
+        return response
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.user.is_authenticated or request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        cache = feed_cache()
+        key = feed_page_key(request)
+        encoding = negotiate(request)
+        encoded_key = '{}:{}'.format(key, encoding)
+
+        cached = cache.get_many([key, encoded_key] if encoding else [key])
+        if encoded_key in cached:
+            response = HttpResponse(content_type=request.accepted_media_type)
+            set_encoded_content(response, cached[encoded_key], encoding)
+            return response
+
+        if key in cached:
+            response = HttpResponse(cached[key], content_type=request.accepted_media_type)
+            self.cache_encoded(request, response, encoded_key)
+            return response
+
+        def store(rendered):
+            cache.set(key, rendered.content, settings.ITEM_FEED_CACHE_TIMEOUT)
+            self.cache_encoded(request, rendered, encoded_key)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(store)
+
+        return response
+
+    def cache_encoded(self, request, response, key):
+        """Compress the page once and keep the result, so cache hits are not compressed again"""
+        if compress_response(request, response):
+            feed_cache().set(key, response.content, settings.ITEM_FEED_CACHE_TIMEOUT)
+
+
+class ItemConditionalMixin:
+    """Answer detail requests with 304 when the item has not changed since the client's copy"""
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            pk = self.kwargs[self.lookup_field]
+            updated_at = self.get_queryset().filter(pk=pk).values_list('updated_at', flat=True).first()
+
+            if updated_at is not None:
+                etag = item_etag(request, pk, updated_at)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+
+        data, updated_at = self.get_representation()
+        return Response(data, headers={'ETag': item_etag(request, self.kwargs[self.lookup_field], updated_at)})
+
+    def get_representation(self):
+        """Return the serialized item and its updated_at"""
+        instance = self.get_object()
+        return self.get_serializer(instance).data, instance.updated_at
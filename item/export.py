@@ -0,0 +1,90 @@
+"""Streaming export of a seller's items and the buyers interested in them.
+
+Items are read through a server-side cursor and buyers are loaded one chunk of
+items at a time, so memory use does not grow with the number of items. Items
+moved to the archive table are read the same way and merged in.
+"""
+import csv
+import heapq
+from collections import defaultdict
+
+from django.db.models import BooleanField, Value
+
+from core.models import ArchivedItem, Item
+from item.renderers import NDJSONRenderer
+
+
+ITEM_FIELDS = ('id', 'name', 'price', 'description', 'url', 'created_at', 'is_sold')
+BUYER_FIELDS = ('name', 'email', 'location')
+CSV_HEADER = ITEM_FIELDS + tuple('buyer_%s' % field for field in BUYER_FIELDS)
+# Spreadsheet apps run a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def iter_seller_items(user, chunk_size):
+    """Yield the seller's live and archived items in one created_at order"""
+    archived = ArchivedItem.objects.filter(user=user).annotate(is_sold=Value(True, output_field=BooleanField()))
+
+    return heapq.merge(
+        iter_items(Item.objects.filter(user=user), chunk_size),
+        iter_items(archived, chunk_size),
+        key=lambda item: (item['created_at'], item['id']),
+    )
+
+
+def iter_items(queryset, chunk_size):
+    """Yield item rows with their buyers attached, one chunk of items at a time"""
+    chunk = []
+    for item in queryset.order_by('created_at', 'id').values(*ITEM_FIELDS).iterator(chunk_size=chunk_size):
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield from attach_buyers(chunk, queryset.model)
+            chunk = []
+
+    if chunk:
+        yield from attach_buyers(chunk, queryset.model)
+
+
+def attach_buyers(items, model=Item):
+    item_id = '%s_id' % model.buyers.field.m2m_field_name()
+    lookups = [item_id] + ['buyer__%s' % field for field in BUYER_FIELDS]
+    links = model.buyers.through.objects.filter(**{item_id + '__in': [item['id'] for item in items]}).values_list(*lookups)
+
+    buyers = defaultdict(list)
+    for item_id, *values in links:
+        buyers[item_id].append(dict(zip(BUYER_FIELDS, values)))
+
+    for item in items:
+        item['buyers'] = buyers[item['id']]
+        yield item
+
+
+def stream_ndjson(items):
+    for item in items:
+        yield NDJSONRenderer.render_row(item)
+
+
+def escape_cell(value):
+    """Quote text that a spreadsheet would otherwise evaluate as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+
+    return value
+
+
+class Echo:
+    """File-like object that hands back what is written, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(items):
+    """Yield one CSV row per item and buyer pair, or a single row for items without buyers"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+
+    for item in items:
+        values = [item[field] for field in ITEM_FIELDS]
+        for buyer in item['buyers'] or [dict.fromkeys(BUYER_FIELDS, '')]:
+            yield writer.writerow([escape_cell(value) for value in values + [buyer[field] for field in BUYER_FIELDS]])
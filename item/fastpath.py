@@ -0,0 +1,95 @@
+"""Serialize items straight from values() rows for the hot read endpoints.
+
+The output is the same JSON as ItemSerializer gives, byte for byte, without
+building model instances or running DRF fields. The item API tests compare
+both paths, so a field added to ItemSerializer has to be added here as well.
+"""
+from django.conf import settings
+
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+from core.models import Buyer, Item
+from item.serializers import ItemCardSerializer, ItemSerializer
+
+
+ITEM_FIELDS = ('id', 'user', 'name', 'price', 'description', 'url', 'buyers')
+BUYER_FIELDS = ('name', 'email', 'location')
+
+
+def item_columns(fields):
+    """The values() columns needed to serialize fields, buyers are attached by item id"""
+    return ['id'] + [field for field in fields if field not in ('id', 'buyers')]
+
+
+def buyers_by_item(item_ids, model=Item):
+    """Load the buyers of every item in one query, ordered as ListingQuerySet.for_listing prefetches them"""
+    buyers = {}
+    related = model.buyers.field.related_query_name()
+    rows = Buyer.objects.filter(**{related + '__in': item_ids}).order_by('email').values_list(related, *BUYER_FIELDS)
+    for item_id, *values in rows:
+        buyers.setdefault(item_id, []).append(dict(zip(BUYER_FIELDS, values)))
+
+    return buyers
+
+
+def serialize_items(rows, fields, model=Item):
+    """Turn item rows from values(*item_columns(fields)) into ItemSerializer(fields=fields) data"""
+    rows = list(rows)
+    fields = [field for field in ITEM_FIELDS if field in fields]
+    buyers = buyers_by_item([row['id'] for row in rows], model) if 'buyers' in fields else {}
+
+    data = []
+    for row in rows:
+        item = {}
+        for field in fields:
+            if field == 'id':
+                item['id'] = str(row['id'])
+            elif field == 'buyers':
+                item['buyers'] = buyers.get(row['id'], [])
+            else:
+                item[field] = row[field]
+        data.append(item)
+
+    return data
+
+
+def fast_path_enabled(serializer_class):
+    return settings.ITEM_FAST_SERIALIZATION and serializer_class in (ItemSerializer, ItemCardSerializer)
+
+
+class FastItemListMixin:
+    """List items from values() rows when the view uses one of the item serializers"""
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if not fast_path_enabled(serializer_class):
+            return super().list(request, *args, **kwargs)
+
+        fields = self.get_requested_fields() or serializer_class.Meta.fields
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        rows = queryset.values(*item_columns(self.get_columns()))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serialize_items(page, fields))
+
+        return Response(serialize_items(rows, fields))
+
+
+class FastItemRetrieveMixin:
+    """Retrieve an item from a values() row, for use with ItemConditionalMixin"""
+
+    def get_representation(self):
+        serializer_class = self.get_serializer_class()
+        if not fast_path_enabled(serializer_class):
+            return super().get_representation()
+
+        fields = serializer_class.Meta.fields
+        queryset = self.get_queryset().prefetch_related(None).values(*item_columns(fields), 'updated_at')
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, row)
+
+        return serialize_items([row], fields)[0], row['updated_at']
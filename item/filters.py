@@ -0,0 +1,62 @@
+from django.utils.dateparse import parse_date
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from utils.states import STATE_CHOICES
+
+
+STATE_CODES = {code for code, _ in STATE_CHOICES}
+
+
+class ItemFilter(BaseFilterBackend):
+    """Filter items by price range, posting date and the seller's state of residence, and sort them"""
+
+    sort_orderings = {
+        'newest': ('-created_at', '-id'),
+        'popular': ('-interest_count', '-created_at', '-id'),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters = {}
+        message = {}
+
+        for param, lookup in (('min_price', 'price__gte'), ('max_price', 'price__lte')):
+            if param in params:
+                try:
+                    filters[lookup] = int(params[param])
+                except ValueError:
+                    message[param] = 'Please provide a whole number for %s' % param
+
+        if 'since' in params:
+            since = self.parse_date(params['since'])
+            if since is None:
+                message['since'] = 'Please provide a date in YYYY-MM-DD format for since'
+            else:
+                filters['created_at__gte'] = since
+
+        if 'state' in params:
+            if params['state'] in STATE_CODES:
+                filters['seller_state'] = params['state']
+            else:
+                message['state'] = 'Please provide a valid state code for state'
+
+        ordering = None
+        if 'sort' in params:
+            ordering = self.sort_orderings.get(params['sort'])
+            if ordering is None:
+                message['sort'] = 'Please provide one of %s for sort' % ', '.join(self.sort_orderings)
+
+        if message:
+            raise ValidationError(message)
+
+        queryset = queryset.filter(**filters)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    @staticmethod
+    def parse_date(value):
+        try:
+            return parse_date(value)
+        except ValueError:
+            return None
@@ -0,0 +1,146 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class FeedCursorPagination(BasePagination):
+    """Keyset pagination over the item feed.
+
+    Pages are addressed by the position of the last (or first) row seen,
+    so every page is a bounded index range scan instead of an OFFSET scan.
+    The ordering must end on a unique column to make positions unambiguous.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = settings.ITEM_FEED_PAGE_SIZE
+    max_page_size = settings.ITEM_FEED_MAX_PAGE_SIZE
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+
+        reverse, position = self.decode_cursor(request)
+
+        if position is not None:
+            try:
+                queryset = queryset.filter(self.get_position_filter(position, reverse))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        order_by = [self.flip(field) if reverse else field for field in self.ordering]
+        results = list(queryset.order_by(*order_by)[:self.page_size + 1])
+
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_feed_ordering'):
+            return view.get_feed_ordering()
+
+        return getattr(view, 'feed_ordering', self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(False, self.get_position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+
+        return self.encode_cursor(True, self.get_position(self.page[0]))
+
+    def get_position(self, item):
+        return [self.get_value(item, field.lstrip('-')) for field in self.ordering]
+
+    def get_value(self, item, name):
+        value = item[name] if isinstance(item, dict) else getattr(item, name)
+        if isinstance(value, (int, float)) or value is None:
+            return value
+
+        return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+    def get_position_filter(self, position, reverse):
+        """Build the row-value comparison (a, b) < (x, y) as an OR of ANDs"""
+        condition = Q()
+        equal = Q()
+
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = '%s__%s' % (name, 'lt' if descending else 'gt')
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{name: value})
+
+        return condition
+
+    def encode_cursor(self, reverse, position):
+        payload = json.dumps({'r': int(reverse), 'p': position}, separators=(',', ':'))
+        cursor = b64encode(payload.encode('utf-8')).decode('ascii')
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            reverse = bool(payload['r'])
+            position = payload['p']
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, position
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
@@ -10,7 +10,18 @@ class BuyerSerializer(serializers.ModelSerializer):
         exclude = ('id', )
 
 
-class ItemSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Only keep the serializer fields named in the fields argument"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer for the item object"""
     buyers = BuyerSerializer(many=True, required=False)
 
@@ -22,3 +33,10 @@ class ItemSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         user = self.context.pop('request', None).user
         return Item.objects.create(user=user, **validated_data)
+
+
+class ItemCardSerializer(ItemSerializer):
+    """Compact item representation for list cards"""
+
+    class Meta(ItemSerializer.Meta):
+        fields = ('id', 'name', 'price', 'url')
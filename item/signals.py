@@ -0,0 +1,47 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Item, Profile
+from item.cache import bump_feed_version
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def item_changed(sender, **kwargs):
+    bump_feed_version()
+
+
+@receiver(post_save, sender=Profile)
+def profile_changed(sender, instance, created, **kwargs):
+    """Copy the state onto the seller's items, feed filters and facets depend on it"""
+    # Items take the state of an existing profile when they are created, so a new profile has none to update.
+    # Profiles added by hand for sellers with items are covered by rebuild_denormalized_items
+    if created:
+        return
+
+    updated = Item.objects.filter(user_id=instance.user_id).exclude(seller_state=instance.state_of_residence).update(
+        seller_state=instance.state_of_residence
+    )
+    if updated:
+        bump_feed_version()
+
+
+@receiver(m2m_changed, sender=Item.buyers.through)
+def item_buyers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Touch the items whose buyers changed so their ETags move on and their interest counts follow"""
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        items = Item.objects.filter(pk=instance.pk)
+    elif reverse and action in ('post_add', 'post_remove'):
+        items = Item.objects.filter(pk__in=pk_set)
+    elif reverse and action == 'pre_clear':
+        # The links are still there, remember the items so post_clear can count what is left
+        instance._cleared_item_ids = list(Item.objects.filter(buyers=instance).values_list('pk', flat=True))
+        return
+    elif reverse and action == 'post_clear':
+        items = Item.objects.filter(pk__in=instance.__dict__.pop('_cleared_item_ids', []))
+    else:
+        return
+
+    items.update(updated_at=timezone.now(), interest_count=Item.objects.interest_count_subquery())
+    bump_feed_version()
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, send_mail
+
+from core import queue
+from core.models import Item
+
+
+@queue.task('item.interest')
+def notify_seller_interest(payloads):
+    """Tell a seller about every buyer who showed interest since the last email"""
+    items = {str(item['id']): item for item in Item.objects.filter(
+        id__in={payload['item'] for payload in payloads}
+    ).values('id', 'name', 'user__email')}
+    if not items:
+        return
+
+    lines = []
+    for payload in payloads:
+        item = items.get(payload['item'])
+        if item is not None:
+            lines.append('%s (%s, %s) is interested in %s' % (payload['name'], payload['email'], payload['location'], item['name']))
+
+    seller = next(iter(items.values()))['user__email']
+    subject = 'New interest in your items' if len(lines) > 1 else 'New interest in your item'
+    send_mail(subject, '\n'.join(lines), settings.DEFAULT_FROM_EMAIL, [seller])
+
+
+@queue.task('item.sold')
+def notify_buyers_sold(payloads):
+    """Tell the interested buyers that an item has been sold"""
+    item = Item.objects.filter(id=payloads[0]['item']).values('name').first()
+    emails = list(Item.buyers.through.objects.filter(item_id=payloads[0]['item']).values_list('buyer__email', flat=True))
+    if item is None or not emails:
+        return
+
+    body = '%s has been sold. Thank you for your interest.' % item['name']
+    EmailMessage('%s has been sold' % item['name'], body, settings.DEFAULT_FROM_EMAIL, bcc=emails).send()
@@ -1,17 +1,43 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.module_loading import import_string
 
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework import status
+from rest_framework.response import Response
 
+import asyncio
+import csv
+import gzip
+import json
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 from uuid import uuid4 as uid
 
-from core.models import Buyer, Item
+from core import queue
+from core.models import ArchivedItem, Buyer, Item, Profile, Task
+from item.cache import get_feed_version
 from item.serializers import ItemSerializer
+from item.views import AsyncItemDetail, AsyncItems, AsyncMarkAsSold, AsyncShowInterest
 
 
 ITEMS_URL = reverse('item:collection')
+SEARCH_URL = reverse('item:search')
+BULK_URL = reverse('item:bulk')
+EXPORT_URL = reverse('item:export')
+FACETS_URL = reverse('item:facets')
 INTEREST_URL = reverse('item:interest')
 MARK_AS_SOLD_URL = reverse('item:marksold')
 
@@ -20,6 +46,7 @@ class PublicItemApiTests(TestCase):
     """Test the publicly available items API"""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.resource_id = uid()
 
@@ -42,11 +69,13 @@ class PublicItemApiTests(TestCase):
         )
 
         res = self.client.get(ITEMS_URL)
-        items = Item.objects.all().order_by('-created_at')
+        items = Item.objects.all().order_by('-created_at', '-id')
         serializer = ItemSerializer(items, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+        self.assertIsNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
 
     def test_login_required_to_create_item(self):
         """Test that login is required for creating an item"""
@@ -123,15 +152,420 @@ class PublicItemApiTests(TestCase):
         res = self.client.post(INTEREST_URL, {})
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_show_interest_invalid_id(self):
+        payload = {
+            'id': 'not-an-id',
+            'name': 'Test Buyer',
+            'email': 'test@c2c.com',
+            'location': 'Lagos'
+        }
+
+        res = self.client.post(INTEREST_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_show_interest_deduplicates_buyer(self):
+        """Test repeat interest from the same email records a single buyer and link"""
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        item = Item.objects.create(
+            user=user,
+            name='Test Item',
+            price=12,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+        payload = {
+            'id': item.id,
+            'name': 'Test Buyer',
+            'email': 'Buyer@C2C.com ',
+            'location': 'Lagos'
+        }
+
+        self.client.post(INTEREST_URL, payload)
+        res = self.client.post(INTEREST_URL, dict(payload, email='buyer@c2c.com', location='Abuja'))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data, {'id': str(item.id), 'email': 'buyer@c2c.com'})
+        self.assertEqual(Buyer.objects.count(), 1)
+        self.assertEqual(Buyer.objects.get().location, 'Abuja')
+        self.assertEqual(item.buyers.count(), 1)
+
+    def test_show_interest_shares_buyer_across_items(self):
+        """Test one buyer interested in several items is stored once"""
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        items = [Item.objects.create(
+            user=user,
+            name='Test Item%d' % i,
+            price=12,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        ) for i in range(2)]
+
+        for item in items:
+            self.client.post(INTEREST_URL, {'id': item.id, 'name': 'Test Buyer', 'email': 'buyer@c2c.com', 'location': 'Lagos'})
+
+        self.assertEqual(Buyer.objects.count(), 1)
+        self.assertEqual(Item.buyers.through.objects.count(), 2)
+
     def test_login_required_to_mark_as_sold(self):
         res = self.client.post(MARK_AS_SOLD_URL, {})
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class ItemFeedPaginationTests(TestCase):
+    """Test the cursor pagination of the public item feed"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+
+    def create_items(self, count):
+        Item.objects.bulk_create([
+            Item(
+                user=self.user,
+                name='Test Item%d' % i,
+                price=i,
+                description='Item%d description' % i,
+                url='c2c.com/static/item%d.jpg' % i
+            ) for i in range(count)
+        ], batch_size=5000)
+
+    def test_walk_feed_forwards_and_backwards(self):
+        """Test following next and previous cursors visits every item once"""
+        self.create_items(7)
+        expected = [str(id) for id in Item.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+
+        pages = []
+        url = ITEMS_URL + '?page_size=3'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            url = res.data['next']
+
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertEqual([item['id'] for page in pages for item in page['results']], expected)
+        self.assertIsNone(pages[0]['previous'])
+
+        res = self.client.get(pages[-1]['previous'])
+
+        self.assertEqual(res.data['results'], pages[1]['results'])
+        self.assertEqual(res.data['next'], pages[1]['next'])
+
+    def test_invalid_cursor(self):
+        """Test a tampered cursor is rejected"""
+        res = self.client.get(ITEMS_URL, {'cursor': 'not-a-cursor'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deep_page_costs_same_as_first_page(self):
+        """Test a deep page in a 100k row feed runs the same query as page 1"""
+        self.create_items(100000)
+        res = self.client.get(ITEMS_URL)
+        paginator = res.renderer_context['view'].paginator
+        deep_item = Item.objects.order_by('-created_at', '-id')[99950]
+        deep_url = paginator.encode_cursor(False, paginator.get_position(deep_item))
+        cache.clear()
+
+        with CaptureQueriesContext(connection) as first:
+            first_res = self.client.get(ITEMS_URL)
+        with CaptureQueriesContext(connection) as deep:
+            deep_res = self.client.get(deep_url)
+
+        self.assertEqual(len(first_res.data['results']), 20)
+        self.assertEqual(len(deep_res.data['results']), 20)
+        self.assertIsNone(self.client.get(deep_url + '&page_size=100').data['next'])
+        self.assertEqual(len(first), len(deep))
+        for query in first.captured_queries + deep.captured_queries:
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+
+class FeedCacheTests(TestCase):
+    """Test the versioned cache of the public item feed"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.item = Item.objects.create(
+            user=self.user,
+            name='Test Item',
+            price=12,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+
+    def test_feed_served_from_cache(self):
+        """Test a repeated feed request is answered without touching the database"""
+        first = self.client.get(ITEMS_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(ITEMS_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+
+    def test_feed_cache_keyed_by_query(self):
+        """Test pages with different query parameters are cached separately"""
+        Item.objects.create(user=self.user, name='Test Item2', price=12, description='Item2 description', url='c2c.com/static/item2.jpg')
+        self.client.get(ITEMS_URL)
+
+        res = self.client.get(ITEMS_URL, {'page_size': 1})
+
+        self.assertEqual(len(res.json()['results']), 1)
+
+    def test_item_writes_invalidate_feed(self):
+        """Test creating, updating and deleting items retires cached pages"""
+        self.client.get(ITEMS_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Item.objects.create(user=self.user, name='Test Item2', price=12, description='Item2 description', url='c2c.com/static/item2.jpg')
+        self.assertEqual(len(self.client.get(ITEMS_URL).json()['results']), 2)
+
+        item.name = 'Updated Item'
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertIn('Updated Item', [row['name'] for row in self.client.get(ITEMS_URL).json()['results']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual(len(self.client.get(ITEMS_URL).json()['results']), 1)
+
+    def test_feed_kept_until_commit(self):
+        """Test cached pages are retired when a write commits, so reads before that cannot cache old rows under the new version"""
+        first = self.client.get(ITEMS_URL)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Item.objects.create(user=self.user, name='Test Item2', price=12, description='Item2 description', url='c2c.com/static/item2.jpg')
+            self.assertEqual(self.client.get(ITEMS_URL).content, first.content)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(self.client.get(ITEMS_URL).json()['results']), 2)
+
+    def test_mark_as_sold_invalidates_feed(self):
+        """Test marking an item as sold removes it from the cached feed"""
+        self.client.get(ITEMS_URL)
+        seller = APIClient()
+        seller.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            seller.post(MARK_AS_SOLD_URL, {'id': self.item.id})
+
+        self.assertEqual(self.client.get(ITEMS_URL).json()['results'], [])
+
+    def test_show_interest_invalidates_feed(self):
+        """Test a buyer showing interest is reflected in the cached feed"""
+        self.client.get(ITEMS_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(INTEREST_URL, {'id': self.item.id, 'name': 'Test Buyer', 'email': 'buyer@c2c.com', 'location': 'Lagos'})
+
+        self.assertEqual(len(self.client.get(ITEMS_URL).json()['results'][0]['buyers']), 1)
+
+    def test_seller_listing_not_cached(self):
+        """Test authenticated listings bypass the public feed cache"""
+        self.client.force_authenticate(self.user)
+        self.client.get(ITEMS_URL)
+
+        with self.assertNumQueries(2):
+            self.client.get(ITEMS_URL)
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETag and If-None-Match handling on the item endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.item = Item.objects.create(
+            user=self.user,
+            name='Test Item',
+            price=12,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+        self.resource_url = reverse('item:resource', args=[self.item.id])
+
+    def test_item_not_modified(self):
+        """Test an unchanged item is answered with 304 in a single query"""
+        etag = self.client.get(self.resource_url)['ETag']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(self.resource_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_item_weak_etag_not_modified(self):
+        """Test If-None-Match uses the weak comparison"""
+        etag = self.client.get(self.resource_url)['ETag']
+        res = self.client.get(self.resource_url, HTTP_IF_NONE_MATCH='"other", W/' + etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_item_modified(self):
+        """Test updates and new buyers change the item ETag"""
+        etag = self.client.get(self.resource_url)['ETag']
+        self.item.buyers.add(Buyer.objects.create(name='Test Buyer', email='buyer@c2c.com', location='Lagos'))
+
+        res = self.client.get(self.resource_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['buyers']), 1)
+
+        self.item.refresh_from_db()
+        self.item.price = 15
+        self.item.save()
+
+        self.assertEqual(self.client.get(self.resource_url, HTTP_IF_NONE_MATCH=res['ETag']).status_code, status.HTTP_200_OK)
+
+    def test_feed_not_modified(self):
+        """Test an unchanged feed page is answered with 304 without any query"""
+        etag = self.client.get(ITEMS_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ITEMS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_feed_modified(self):
+        """Test item writes change the feed ETag"""
+        etag = self.client.get(ITEMS_URL)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(user=self.user, name='Test Item2', price=12, description='Item2 description', url='c2c.com/static/item2.jpg')
+
+        res = self.client.get(ITEMS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_seller_listing_etag_per_user(self):
+        """Test sellers do not share list ETags with the public feed"""
+        etag = self.client.get(ITEMS_URL)['ETag']
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(ITEMS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class SearchItemApiTests(TestCase):
+    """Test the full-text item search API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+
+    def create_item(self, name, description, **params):
+        return Item.objects.create(
+            user=self.user,
+            name=name,
+            price=12,
+            description=description,
+            url='c2c.com/static/item.jpg',
+            **params
+        )
+
+    def test_search_ranks_matches(self):
+        """Test only matching unsold items are returned, best match first"""
+        weak = self.create_item('Table', 'Comes with a bicycle pump and three chairs for the dining room')
+        strong = self.create_item('Bicycle', 'Red bicycle')
+        self.create_item('Chair', 'Wooden chair')
+        self.create_item('Bicycle', 'Sold bicycle', is_sold=True)
+
+        res = self.client.get(SEARCH_URL, {'q': 'bicycle'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data['results']], [str(strong.id), str(weak.id)])
+
+    def test_search_follows_updates_and_deletes(self):
+        """Test the search index follows item updates and deletes"""
+        item = self.create_item('Lamp', 'Desk lamp')
+        Item.objects.filter(id=item.id).update(name='Kettle', description='Electric kettle')
+        deleted = self.create_item('Kettle', 'Old kettle')
+        deleted.delete()
+
+        self.assertEqual(len(self.client.get(SEARCH_URL, {'q': 'lamp'}).data['results']), 0)
+        self.assertEqual(len(self.client.get(SEARCH_URL, {'q': 'kettle'}).data['results']), 1)
+
+    def test_search_paginates(self):
+        """Test search results are cursor paginated like the feed"""
+        for i in range(5):
+            self.create_item('Phone %d' % i, 'Phone ' * (i + 1))
+
+        first = self.client.get(SEARCH_URL, {'q': 'phone', 'page_size': 3})
+        second = self.client.get(first.data['next'])
+        ids = [item['id'] for item in first.data['results'] + second.data['results']]
+
+        self.assertEqual(len(set(ids)), 5)
+        self.assertIsNone(second.data['next'])
+
+    def test_search_quotes_query_syntax(self):
+        """Test search operators in the query are matched literally"""
+        res = self.client.get(SEARCH_URL, {'q': 'bike" OR NEAR(*'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_search_rejects_sort(self):
+        """Test asking search for another order is an error rather than silently ignored"""
+        res = self.client.get(SEARCH_URL, {'q': 'lamp', 'sort': 'popular'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sort', res.data)
+
+    def test_search_requires_query(self):
+        res = self.client.get(SEARCH_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ItemQueryCountTests(TestCase):
+    """Test item lists are loaded in a constant number of queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+
+    def create_items(self, count):
+        for i in range(count):
+            item = Item.objects.create(
+                user=self.user,
+                name='Test Item%d' % i,
+                price=12,
+                description='Item%d description' % i,
+                url='c2c.com/static/item%d.jpg' % i
+            )
+            for j in range(2):
+                item.buyers.add(Buyer.objects.create(name='Test Buyer%d' % j, email='%s@c2c.com' % uid(), location='Lagos'))
+
+    def test_feed_query_count_constant(self):
+        """Test the public feed does not issue a query per item"""
+        for count in (2, 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_items(count)
+            with self.assertNumQueries(2):
+                res = self.client.get(ITEMS_URL)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(all(len(item['buyers']) == 2 for item in res.data['results']))
+
+    def test_seller_listing_query_count_constant(self):
+        """Test the seller listing does not issue a query per item"""
+        self.client.force_authenticate(self.user)
+        for count in (2, 10):
+            self.create_items(count)
+            with self.assertNumQueries(2):
+                res = self.client.get(ITEMS_URL)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertTrue(all(len(item['buyers']) == 2 for item in res.data))
+
+
 class PrivateItemApiTests(TestCase):
     """Test the authorized user items API"""
 
     def setUp(self):
+        cache.clear()
         self.user = get_user_model().objects.create_user(
             'test@c2c.com',
             'password'
@@ -264,9 +698,8 @@ class PrivateItemApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
 
     def test_mark_as_sold_valid_item_exists(self):
-        user = get_user_model().objects.create_user('test1@c2c.com', 'testpassword')
         item = Item.objects.create(
-            user=user,
+            user=self.user,
             name='Test Item',
             price=12,
             description='Item description',
@@ -281,8 +714,78 @@ class PrivateItemApiTests(TestCase):
         item.refresh_from_db()
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'ids': [str(item.id)]})
         self.assertTrue(item.is_sold)
 
+        res = self.client.post(MARK_AS_SOLD_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'ids': []})
+
+    def test_mark_as_sold_other_users_item(self):
+        """Test sellers cannot mark another seller's item as sold"""
+        user = get_user_model().objects.create_user('test1@c2c.com', 'testpassword')
+        item = Item.objects.create(
+            user=user,
+            name='Test Item',
+            price=12,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+
+        res = self.client.post(MARK_AS_SOLD_URL, {'id': item.id})
+
+        item.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(item.is_sold)
+
+    def test_mark_as_sold_many(self):
+        """Test a batch of items is marked sold and only the ones that changed are returned"""
+        other = get_user_model().objects.create_user('test1@c2c.com', 'testpassword')
+        items = [
+            Item.objects.create(user=user, name='Test Item', price=12, description='Item description', url='c2c.com/static/item.jpg')
+            for user in (self.user, self.user, self.user, other)
+        ]
+        Item.objects.filter(pk=items[2].pk).update(is_sold=True)
+        ids = [str(item.id) for item in items] + [str(uid())]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(MARK_AS_SOLD_URL, {'ids': ids}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(res.data['ids'], ids[:2])
+        self.assertEqual(len([query for query in queries if query['sql'].lstrip().startswith('UPDATE')]), 1)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT')]), 1)
+        self.assertEqual(set(Item.objects.filter(is_sold=True).values_list('pk', flat=True)), {item.pk for item in items[:3]})
+        self.assertCountEqual(Task.objects.filter(name='item.sold').values_list('batch_key', flat=True), ['item:%s' % id for id in ids[:2]])
+
+    def test_mark_as_sold_many_updates_etag(self):
+        """Test items marked sold in bulk get a new ETag"""
+        item = Item.objects.create(user=self.user, name='Test Item', price=12, description='Item description', url='c2c.com/static/item.jpg')
+        resource_url = reverse('item:resource', args=[item.id])
+        etag = self.client.get(resource_url)['ETag']
+
+        self.client.post(MARK_AS_SOLD_URL, {'ids': [str(item.id)]}, format='json')
+
+        self.assertNotEqual(self.client.get(resource_url)['ETag'], etag)
+
+    def test_mark_as_sold_many_invalid(self):
+        """Test ids must be a bounded list of item ids"""
+        res = self.client.post(MARK_AS_SOLD_URL, {'ids': 'abc'}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(MARK_AS_SOLD_URL, {'ids': [str(uid()), 'abc']}, format='json')
+        self.assertEqual(res.data, {'ids': 'Please provide valid item ids for ids'})
+
+        with self.settings(ITEM_BULK_MAX_ROWS=1):
+            res = self.client.post(MARK_AS_SOLD_URL, {'ids': [str(uid()), str(uid())]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_mark_as_sold_invalid_id(self):
+        """Test a malformed id is reported as a missing item"""
+        res = self.client.post(MARK_AS_SOLD_URL, {'id': 'abc'})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_mark_as_sold_valid_item_does_not_exist(self):
         payload = {
             'id': uid()
@@ -295,3 +798,786 @@ class PrivateItemApiTests(TestCase):
     def test_mark_as_sold_invalid(self):
         res = self.client.post(MARK_AS_SOLD_URL, {})
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BulkCreateItemApiTests(TestCase):
+    """Test the bulk item creation API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def item_payload(self, i):
+        return {
+            'name': 'Test Item%d' % i,
+            'price': i,
+            'description': 'Item%d description' % i,
+            'url': 'c2c.com/static/item%d.jpg' % i
+        }
+
+    def test_login_required_to_bulk_create(self):
+        res = APIClient().post(BULK_URL, [], format='json')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_create_json(self):
+        """Test a JSON array of items is created for the seller"""
+        payload = [self.item_payload(i) for i in range(300)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['created']), 300)
+        self.assertEqual(res.data['errors'], [])
+        self.assertEqual(Item.objects.filter(user=self.user).count(), 300)
+
+    def test_bulk_create_ndjson(self):
+        """Test an NDJSON stream of items is created for the seller"""
+        lines = [json.dumps(self.item_payload(i)) for i in range(3)]
+
+        res = self.client.post(BULK_URL, '\n'.join(lines) + '\n', content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Item.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_create_partial_errors(self):
+        """Test invalid rows are reported without aborting the valid rows"""
+        payload = [self.item_payload(0), {'name': '', 'price': 'abc'}, 'not an item', self.item_payload(3)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data['created']), 2)
+        self.assertEqual([error['index'] for error in res.data['errors']], [1, 2])
+        self.assertIn('price', res.data['errors'][0]['errors'])
+        self.assertEqual(Item.objects.count(), 2)
+
+    def test_bulk_create_all_invalid(self):
+        """Test a payload without a single valid row fails"""
+        res = self.client.post(BULK_URL, [{'name': ''}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Item.objects.exists())
+
+    def test_bulk_create_invalid_payload(self):
+        """Test payloads that are not a list of items are rejected"""
+        for payload in ({'name': 'Test Item'}, []):
+            res = self.client.post(BULK_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_invalidates_feed(self):
+        """Test bulk created items show up in the cached public feed"""
+        APIClient().get(ITEMS_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(BULK_URL, [self.item_payload(0)], format='json')
+
+        res = APIClient().get(ITEMS_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+
+class ExportItemApiTests(TestCase):
+    """Test the streaming item export API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        other = get_user_model().objects.create_user('test1@c2c.com', 'password')
+        Item.objects.create(user=other, name='Other Item', price=12, description='Other description', url='c2c.com/static/other.jpg')
+
+        self.items = [Item.objects.create(
+            user=self.user,
+            name='Test Item%d' % i,
+            price=i,
+            description='Item%d description' % i,
+            url='c2c.com/static/item%d.jpg' % i
+        ) for i in range(5)]
+        for j in range(2):
+            self.items[0].buyers.add(Buyer.objects.create(name='Test Buyer%d' % j, email='buyer%d@c2c.com' % j, location='Lagos'))
+
+    def test_login_required_to_export(self):
+        res = APIClient().get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_ndjson(self):
+        """Test the seller's items stream as one JSON object per line"""
+        res = self.client.get(EXPORT_URL)
+        rows = [json.loads(line) for line in b''.join(res.streaming_content).decode('utf-8').splitlines()]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        self.assertEqual(sorted(row['id'] for row in rows), sorted(str(item.id) for item in self.items))
+        buyers = {row['id']: row['buyers'] for row in rows}[str(self.items[0].id)]
+        self.assertEqual(sorted(buyer['email'] for buyer in buyers), ['buyer0@c2c.com', 'buyer1@c2c.com'])
+
+    def test_export_csv(self):
+        """Test the export streams one CSV row per item and buyer pair"""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+        rows = list(csv.DictReader(b''.join(res.streaming_content).decode('utf-8').splitlines()))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(sorted(row['buyer_email'] for row in rows if row['id'] == str(self.items[0].id)), ['buyer0@c2c.com', 'buyer1@c2c.com'])
+
+    def test_export_csv_escapes_formulas(self):
+        """Test text cells a spreadsheet would run as a formula are quoted"""
+        Item.objects.filter(pk=self.items[1].pk).update(name='=HYPERLINK("http://evil.com")', description='-2+3')
+        self.items[1].buyers.add(Buyer.objects.create(name='@SUM(1)', email='buyer2@c2c.com', location='\tLagos'))
+
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+        row = next(row for row in csv.DictReader(b''.join(res.streaming_content).decode('utf-8').splitlines()) if row['id'] == str(self.items[1].id))
+
+        self.assertEqual(row['name'], '\'=HYPERLINK("http://evil.com")')
+        self.assertEqual(row['description'], "'-2+3")
+        self.assertEqual(row['buyer_name'], "'@SUM(1)")
+        self.assertEqual(row['buyer_location'], "'\tLagos")
+        self.assertEqual(row['price'], '1')
+
+    @override_settings(ITEM_EXPORT_CHUNK_SIZE=2)
+    def test_export_loads_buyers_per_chunk(self):
+        """Test buyers are loaded with one query per chunk of items"""
+        res = self.client.get(EXPORT_URL)
+
+        # The items and archived items cursors, and buyers for each of the three chunks of items
+        with self.assertNumQueries(5):
+            lines = b''.join(res.streaming_content).splitlines()
+
+        self.assertEqual(len(lines), 5)
+
+    def test_export_includes_archived(self):
+        """Test items moved to the archive are still exported, in created_at order, with their buyers"""
+        Item.objects.filter(pk=self.items[0].pk).update(is_sold=True, sold_at=timezone.now() - timedelta(days=100))
+        Item.objects.filter(pk=self.items[0].pk).update(created_at=date(2020, 1, 1))
+        call_command('archive_sold_items', days=30, stdout=StringIO())
+
+        res = self.client.get(EXPORT_URL)
+        rows = [json.loads(line) for line in b''.join(res.streaming_content).decode('utf-8').splitlines()]
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['id'], str(self.items[0].id))
+        self.assertTrue(rows[0]['is_sold'])
+        self.assertEqual(sorted(buyer['email'] for buyer in rows[0]['buyers']), ['buyer0@c2c.com', 'buyer1@c2c.com'])
+
+
+class FilterItemApiTests(TestCase):
+    """Test filtering and faceting the public item feed"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.lagos = self.create_seller('lagos@c2c.com', 'LA')
+        self.abia = self.create_seller('abia@c2c.com', 'AB')
+        self.cheap = self.create_item(self.lagos, 500)
+        self.mid = self.create_item(self.lagos, 7000)
+        self.dear = self.create_item(self.abia, 750000)
+        Item.objects.filter(id=self.cheap.id).update(created_at='2020-01-01')
+
+    def create_seller(self, email, state):
+        user = get_user_model().objects.create_user(email, 'testpassword')
+        Profile.objects.create(user=user, first_name='Test', last_name='User', state_of_residence=state)
+        return user
+
+    def create_item(self, user, price):
+        return Item.objects.create(
+            user=user,
+            name='Test Item',
+            price=price,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+
+    def feed_ids(self, params):
+        res = self.client.get(ITEMS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {item['id'] for item in res.data['results']}
+
+    def test_filter_price_range(self):
+        """Test the feed can be narrowed to a price range"""
+        self.assertEqual(self.feed_ids({'min_price': 1000}), {str(self.mid.id), str(self.dear.id)})
+        self.assertEqual(self.feed_ids({'min_price': 1000, 'max_price': 10000}), {str(self.mid.id)})
+
+    def test_filter_since(self):
+        """Test the feed can be narrowed to recently posted items"""
+        self.assertEqual(self.feed_ids({'since': '2021-01-01'}), {str(self.mid.id), str(self.dear.id)})
+
+    def test_filter_state(self):
+        """Test the feed can be narrowed to sellers living in a state"""
+        self.assertEqual(self.feed_ids({'state': 'LA'}), {str(self.cheap.id), str(self.mid.id)})
+
+    def test_filter_follows_profile_state(self):
+        """Test a seller moving state is reflected in the cached feed"""
+        self.feed_ids({'state': 'AB'})
+        profile = Profile.objects.get(user=self.abia)
+        profile.state_of_residence = 'LA'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        self.assertEqual(self.feed_ids({'state': 'AB'}), set())
+
+    def test_filter_invalid(self):
+        """Test malformed filter values are rejected"""
+        res = self.client.get(ITEMS_URL, {'min_price': 'abc', 'since': '2020-13-45', 'state': 'XX'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(res.data), {'min_price', 'since', 'state'})
+
+    def test_facets(self):
+        """Test facet counts are computed in a single query"""
+        with self.assertNumQueries(1):
+            res = self.client.get(FACETS_URL)
+
+        states = {state['code']: state['count'] for state in res.data['states']}
+        prices = {price['min']: price['count'] for price in res.data['prices']}
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(states['LA'], 2)
+        self.assertEqual(states['AB'], 1)
+        self.assertEqual(sum(states.values()), 3)
+        self.assertEqual(prices[0], 1)
+        self.assertEqual(prices[5000], 1)
+        self.assertEqual(prices[500000], 1)
+        self.assertIsNone(res.data['prices'][-1]['max'])
+
+    def test_facets_filtered_and_cached(self):
+        """Test facets honour the feed filters and are served from the cache"""
+        res = self.client.get(FACETS_URL, {'max_price': 10000})
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(FACETS_URL, {'max_price': 10000})
+
+        states = {state['code']: state['count'] for state in res.data['states']}
+        self.assertEqual(states['LA'], 2)
+        self.assertEqual(states['AB'], 0)
+        self.assertEqual(cached.content, res.content)
+
+    def test_sort_popular(self):
+        """Test the feed can be sorted by the number of interested buyers"""
+        for email in ('one@c2c.com', 'two@c2c.com'):
+            self.client.post(INTEREST_URL, {'id': self.dear.id, 'name': 'Buyer', 'email': email, 'location': 'Lagos'})
+        self.client.post(INTEREST_URL, {'id': self.mid.id, 'name': 'Buyer', 'email': 'one@c2c.com', 'location': 'Lagos'})
+
+        res = self.client.get(ITEMS_URL, {'sort': 'popular', 'page_size': 2})
+        following = self.client.get(res.data['next'])
+
+        self.assertEqual([item['id'] for item in res.data['results']], [str(self.dear.id), str(self.mid.id)])
+        self.assertEqual([item['id'] for item in following.data['results']], [str(self.cheap.id)])
+
+    def test_sort_invalid(self):
+        """Test unknown sort orders are rejected"""
+        res = self.client.get(ITEMS_URL, {'sort': 'cheapest'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sort', res.data)
+
+
+class DenormalizedItemTests(TestCase):
+    """Test the seller state and interest count copied onto items"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.profile = Profile.objects.create(user=self.user, first_name='Test', last_name='User', state_of_residence='LA')
+        self.item = Item.objects.create(
+            user=self.user,
+            name='Test Item',
+            price=5000,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+
+    def show_interest(self, email):
+        return self.client.post(INTEREST_URL, {'id': self.item.id, 'name': 'Buyer', 'email': email, 'location': 'Lagos'})
+
+    def test_new_item_takes_seller_state(self):
+        """Test items are created with the seller's state of residence"""
+        self.assertEqual(self.item.seller_state, 'LA')
+
+    def test_seller_state_follows_profile(self):
+        """Test a seller moving state is copied onto their items"""
+        self.profile.state_of_residence = 'AB'
+        self.profile.save()
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.seller_state, 'AB')
+
+    def test_interest_counted_once_per_buyer(self):
+        """Test a buyer showing interest twice only counts once"""
+        self.show_interest('one@c2c.com')
+        self.show_interest('ONE@c2c.com')
+        self.show_interest('two@c2c.com')
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.interest_count, 2)
+
+    def test_interest_count_follows_buyers(self):
+        """Test removing buyers directly keeps the count in step"""
+        self.show_interest('one@c2c.com')
+        self.item.buyers.clear()
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.interest_count, 0)
+
+    def test_interest_count_follows_buyer_clear(self):
+        """Test clearing a buyer's items from the buyer side recounts once the links are gone"""
+        self.show_interest('one@c2c.com')
+
+        Buyer.objects.get(email='one@c2c.com').item_set.clear()
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.interest_count, 0)
+
+    def test_profile_name_change_keeps_feed(self):
+        """Test a profile save that moves no item state leaves the cached feed alone"""
+        version = get_feed_version()
+        self.profile.first_name = 'Changed'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.save()
+
+        self.assertEqual(get_feed_version(), version)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command recomputes drifted columns in batches"""
+        self.show_interest('one@c2c.com')
+        Item.objects.create(
+            user=self.user,
+            name='Another Item',
+            price=5000,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+        Item.objects.update(seller_state='', interest_count=7)
+
+        out = StringIO()
+        call_command('rebuild_denormalized_items', batch_size=1, stdout=out)
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.seller_state, 'LA')
+        self.assertEqual(self.item.interest_count, 1)
+        self.assertIn('Rebuilt 2 items', out.getvalue())
+
+
+class AsyncItemViewTests(TransactionTestCase):
+    """Test the coroutine variants of the item views served under ASGI, whose queries run on other threads"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.item = Item.objects.create(
+            user=self.user,
+            name='Test Item',
+            price=5000,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        )
+
+    def test_views_are_coroutines(self):
+        """Test the ASGI variants are detected as async views by Django"""
+        for view in (AsyncItems, AsyncItemDetail, AsyncShowInterest, AsyncMarkAsSold):
+            self.assertTrue(asyncio.iscoroutinefunction(view.as_view()))
+
+    def test_list_items(self):
+        """Test the feed is rendered by the async view"""
+        res = async_to_sync(AsyncItems.as_view())(self.factory.get(ITEMS_URL))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)['results'][0]['id'], str(self.item.id))
+
+    def test_mark_as_sold(self):
+        """Test writes made through the async view reach the database"""
+        request = self.factory.post(MARK_AS_SOLD_URL, {'id': self.item.id}, format='json')
+        force_authenticate(request, user=self.user)
+
+        res = async_to_sync(AsyncMarkAsSold.as_view())(request)
+
+        self.item.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.item.is_sold)
+
+    def test_middleware_runs_async(self):
+        """Test no middleware is sync only, which would run every async request on one thread"""
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), 'async_capable', False), path)
+
+    def test_slow_requests_run_concurrently(self):
+        """Test a slow request does not hold up the others in the same worker"""
+        threads = []
+
+        def slow_get(view, request, *args, **kwargs):
+            threads.append(threading.get_ident())
+            time.sleep(0.3)
+            return Response({})
+
+        async def gather(view):
+            return await asyncio.gather(*[view(self.factory.get(ITEMS_URL)) for _ in range(4)])
+
+        with mock.patch.object(AsyncItems, 'get', slow_get):
+            start = time.perf_counter()
+            responses = async_to_sync(gather)(AsyncItems.as_view())
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual([res.status_code for res in responses], [status.HTTP_200_OK] * 4)
+        self.assertEqual(len(set(threads)), 4)
+        self.assertLess(elapsed, 1.0)
+
+
+class ItemNotificationTests(TestCase):
+    """Test ShowInterest and MarkAsSold notify by email from the task queue"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('seller@c2c.com', 'testpassword')
+        self.items = [Item.objects.create(
+            user=self.user,
+            name='Test Item %d' % index,
+            price=5000,
+            description='Item description',
+            url='c2c.com/static/item.jpg'
+        ) for index in range(2)]
+
+    def show_interest(self, item, email):
+        res = self.client.post(INTEREST_URL, {'id': item.id, 'name': 'Buyer', 'email': email, 'location': 'Lagos'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def run_worker(self):
+        Task.objects.update(run_at=timezone.now())
+        return queue.work()
+
+    def test_interest_notified_in_one_email_per_seller(self):
+        """Test interest is not emailed inline and is batched per seller"""
+        self.show_interest(self.items[0], 'one@c2c.com')
+        self.show_interest(self.items[1], 'two@c2c.com')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(self.run_worker(), 2)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['seller@c2c.com'])
+        self.assertIn('one@c2c.com', mail.outbox[0].body)
+        self.assertIn('Test Item 1', mail.outbox[0].body)
+
+    def test_interest_not_queued_when_write_fails(self):
+        """Test the notification is stored in the same transaction as the interest"""
+        with mock.patch('core.queue.enqueue', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(INTEREST_URL, {'id': self.items[0].id, 'name': 'Buyer', 'email': 'one@c2c.com', 'location': 'Lagos'})
+
+        self.assertFalse(Buyer.objects.exists())
+        self.assertEqual(Item.objects.get(pk=self.items[0].pk).interest_count, 0)
+
+    def test_interest_in_missing_item_not_queued(self):
+        """Test interest in an item that does not exist is a 404 and queues nothing"""
+        res = self.client.post(INTEREST_URL, {'id': uid(), 'name': 'Buyer', 'email': 'one@c2c.com', 'location': 'Lagos'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Task.objects.exists())
+
+    def test_sold_notifies_buyers(self):
+        """Test marking an item as sold emails its interested buyers"""
+        self.show_interest(self.items[0], 'one@c2c.com')
+        self.run_worker()
+        mail.outbox.clear()
+
+        self.client.force_authenticate(self.user)
+        res = self.client.post(MARK_AS_SOLD_URL, {'id': self.items[0].id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].bcc, ['one@c2c.com'])
+
+
+class SparseFieldsApiTests(TestCase):
+    """Test the feed can return a subset of the item fields"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        for index in range(3):
+            item = Item.objects.create(
+                user=self.user,
+                name='Test Item %d' % index,
+                price=5000,
+                description='Item description',
+                url='c2c.com/static/item.jpg'
+            )
+            item.buyers.add(Buyer.objects.create(name='Buyer', email='%s@c2c.com' % uid(), location='Lagos'))
+
+    def get(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ITEMS_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, [query['sql'] for query in queries.captured_queries]
+
+    def test_fields_selected(self):
+        """Test only the requested fields are returned and loaded"""
+        res, queries = self.get({'fields': 'id,name'})
+
+        self.assertEqual(set(res.data['results'][0]), {'id', 'name'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0])
+
+    def test_card_view(self):
+        """Test the card view returns the compact representation without buyers"""
+        res, queries = self.get({'view': 'card', 'sort': 'popular'})
+
+        self.assertEqual(set(res.data['results'][0]), {'id', 'name', 'price', 'url'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0])
+
+    def test_full_item_by_default(self):
+        """Test the feed returns every item field unless asked otherwise"""
+        res, queries = self.get({})
+
+        self.assertEqual(set(res.data['results'][0]), set(ItemSerializer.Meta.fields))
+        self.assertEqual(len(queries), 2)
+
+    def test_invalid_fields(self):
+        """Test unknown fields and views are rejected"""
+        self.assertEqual(self.client.get(ITEMS_URL, {'fields': 'name,secret'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(ITEMS_URL, {'view': 'card', 'fields': 'description'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(ITEMS_URL, {'view': 'table'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class FastPathApiTests(TestCase):
+    """Test the values() based serialization matches ItemSerializer byte for byte"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.items = []
+        for index in range(3):
+            item = Item.objects.create(
+                user=self.user,
+                name='Tést Item %d' % index,
+                price=5000 + index,
+                description='Line one line two',
+                url='c2c.com/static/item.jpg'
+            )
+            for email in ('zed@c2c.com', 'amy@c2c.com')[:index]:
+                buyer, _ = Buyer.objects.get_or_create(email=email, defaults={'name': 'Büyer', 'location': 'Lagos'})
+                item.buyers.add(buyer)
+            self.items.append(item)
+
+    def assertSameContent(self, url, params=None, user=None):
+        self.client.force_authenticate(user)
+        responses = []
+        for fast in (True, False):
+            cache.clear()
+            with self.settings(ITEM_FAST_SERIALIZATION=fast):
+                responses.append(self.client.get(url, params))
+
+        self.assertEqual(responses[0].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses[0].content, responses[1].content)
+
+    def test_feed(self):
+        """Test the public feed, with and without sparse fields"""
+        self.assertSameContent(ITEMS_URL)
+        self.assertSameContent(ITEMS_URL, {'page_size': 2, 'sort': 'popular'})
+        self.assertSameContent(ITEMS_URL, {'fields': 'buyers,name'})
+        self.assertSameContent(ITEMS_URL, {'view': 'card'})
+
+    def test_owner_listing(self):
+        """Test the seller's own listing"""
+        self.assertSameContent(ITEMS_URL, user=self.user)
+
+    def test_detail(self):
+        """Test a single item"""
+        self.assertSameContent(reverse('item:resource', args=[self.items[2].id]))
+
+    def test_detail_not_found(self):
+        """Test a missing item is a 404 on the fast path"""
+        res = self.client.get(reverse('item:resource', args=[uid()]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CompressedFeedTests(TestCase):
+    """Test feed pages are cached compressed once per content coding"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        for index in range(20):
+            Item.objects.create(user=user, name='Test Item %d' % index, price=12, description='Item description', url='c2c.com/static/item.jpg')
+
+    @override_settings(COMPRESSION_MIN_SIZE=100)
+    def test_cached_compressed_page(self):
+        """Test a cached page is served compressed without compressing it again"""
+        plain = self.client.get(ITEMS_URL)
+        first = self.client.get(ITEMS_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        with mock.patch('core.compression.encode') as encode, self.assertNumQueries(0):
+            res = self.client.get(ITEMS_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        encode.assert_not_called()
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertEqual(res['ETag'], 'W/' + plain['ETag'])
+        self.assertEqual(res.content, first.content)
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+        res = self.client.get(ITEMS_URL, HTTP_IF_NONE_MATCH=res['ETag'], HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(COMPRESSION_MIN_SIZE=100)
+    def test_first_page_compressed(self):
+        """Test the page that fills the cache is compressed too"""
+        res = self.client.get(ITEMS_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(res.content))['results']), 20)
+
+
+@override_settings(REST_FRAMEWORK=dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={'interest': '3/min', 'interest_email': '2/min'}))
+class ThrottledInterestApiTests(TestCase):
+    """Test showing interest is rate limited per client and per buyer email"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.item = Item.objects.create(user=user, name='Test Item', price=12, description='Item description', url='c2c.com/static/item.jpg')
+
+    def show_interest(self, email, ip='10.0.0.1'):
+        payload = {'id': self.item.id, 'name': 'Test Buyer', 'email': email, 'location': 'Lagos'}
+        return self.client.post(INTEREST_URL, payload, REMOTE_ADDR=ip)
+
+    def test_limited_per_client(self):
+        """Test a client is refused before any query once over the limit"""
+        for index in range(3):
+            self.assertEqual(self.show_interest('buyer%d@c2c.com' % index).status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            res = self.show_interest('buyer4@c2c.com')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.show_interest('buyer4@c2c.com', ip='10.0.0.2').status_code, status.HTTP_201_CREATED)
+
+    def test_limited_per_email(self):
+        """Test one buyer email is limited across clients"""
+        self.show_interest('buyer@c2c.com', ip='10.0.0.1')
+        self.show_interest('buyer@c2c.com', ip='10.0.0.2')
+
+        res = self.show_interest('buyer@c2c.com', ip='10.0.0.3')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class ArchivedItemTests(TestCase):
+    """Test moving old sold items to the archive table and listing them"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('test@c2c.com', 'testpassword')
+        self.buyer = Buyer.objects.create(name='Test Buyer', email='buyer@c2c.com', location='Lagos')
+        self.items = []
+        for index in range(4):
+            item = Item.objects.create(
+                user=self.user,
+                name='Test Item%d' % index,
+                price=index,
+                description='Item%d description' % index,
+                url='c2c.com/static/item%d.jpg' % index
+            )
+            item.buyers.add(self.buyer)
+            Item.objects.filter(pk=item.pk).update(created_at=date(2020, 1, 1) + timedelta(days=index))
+            self.items.append(item)
+
+    def sell(self, item, days_ago):
+        Item.objects.filter(pk=item.pk).update(is_sold=True, sold_at=timezone.now() - timedelta(days=days_ago))
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command('archive_sold_items', stdout=out, **options)
+        return out.getvalue()
+
+    def test_mark_sold_sets_sold_at(self):
+        """Test marking an item sold, in bulk or on save, records when"""
+        Item.objects.mark_sold(self.user, [self.items[0].pk])
+        self.items[1].is_sold = True
+        self.items[1].save()
+
+        for item in self.items[:2]:
+            item.refresh_from_db()
+            self.assertIsNotNone(item.sold_at)
+        self.assertIsNone(Item.objects.get(pk=self.items[2].pk).sold_at)
+
+    def test_archive_old_sold_items(self):
+        """Test only items sold more than --days ago move, with their buyers"""
+        self.sell(self.items[0], 100)
+        self.sell(self.items[1], 10)
+
+        out = self.archive(days=30)
+
+        self.assertIn('Archived 1 items', out)
+        self.assertFalse(Item.objects.filter(pk=self.items[0].pk).exists())
+        archived = ArchivedItem.objects.get(pk=self.items[0].pk)
+        self.assertEqual(archived.name, 'Test Item0')
+        self.assertEqual(archived.created_at, date(2020, 1, 1))
+        self.assertEqual(list(archived.buyers.all()), [self.buyer])
+        self.assertEqual(Item.objects.count(), 3)
+
+    def test_archive_in_batches_and_resumes(self):
+        """Test the command moves every batch and a second run has nothing left"""
+        for item in self.items[:3]:
+            self.sell(item, 100)
+
+        self.assertIn('Archived 3 items', self.archive(days=30, batch_size=2))
+        self.assertIn('Archived 0 items', self.archive(days=30, batch_size=2))
+        self.assertEqual(ArchivedItem.objects.count(), 3)
+
+    def test_listing_excludes_archived_by_default(self):
+        """Test archived items stay out of the seller's listing unless asked for"""
+        self.sell(self.items[0], 100)
+        self.archive(days=30)
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(ITEMS_URL)
+
+        self.assertEqual(len(res.data), 3)
+
+    def test_listing_includes_archived(self):
+        """Test include_archived merges archived items in feed order on both paths"""
+        self.sell(self.items[0], 100)
+        self.sell(self.items[2], 100)
+        self.archive(days=30)
+        self.client.force_authenticate(self.user)
+
+        for fast in (True, False):
+            with self.settings(ITEM_FAST_SERIALIZATION=fast):
+                res = self.client.get(ITEMS_URL, {'include_archived': '1'})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual([item['name'] for item in res.data], ['Test Item3', 'Test Item2', 'Test Item1', 'Test Item0'])
+            self.assertEqual(res.data[1]['buyers'], [{'name': 'Test Buyer', 'email': 'buyer@c2c.com', 'location': 'Lagos'}])
+
+    def test_listing_includes_archived_filtered(self):
+        """Test filters and sparse fields apply to archived items too"""
+        self.sell(self.items[0], 100)
+        self.archive(days=30)
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(ITEMS_URL, {'include_archived': '1', 'max_price': 1, 'fields': 'name'})
+
+        self.assertEqual(res.data, [{'name': 'Test Item1'}, {'name': 'Test Item0'}])
+
+    def test_include_archived_invalid(self):
+        """Test include_archived only takes 0 or 1"""
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(ITEMS_URL, {'include_archived': 'yes'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,13 +1,23 @@
+from django.conf import settings
 from django.urls import path
 from item import views
 
 
 app_name = 'item'
 
+if settings.ITEM_ASYNC_VIEWS:
+    Items, ItemDetail, ShowInterest, MarkAsSold = views.AsyncItems, views.AsyncItemDetail, views.AsyncShowInterest, views.AsyncMarkAsSold
+else:
+    Items, ItemDetail, ShowInterest, MarkAsSold = views.Items, views.ItemDetail, views.ShowInterest, views.MarkAsSold
+
 
 urlpatterns = [
-    path('', views.Items.as_view(), name='collection'),
-    path('<uuid:pk>/', views.ItemDetail.as_view(), name='resource'),
-    path('interest/', views.ShowInterest.as_view(), name='interest'),
-    path('marksold/', views.MarkAsSold.as_view(), name='marksold'),
+    path('', Items.as_view(), name='collection'),
+    path('bulk/', views.BulkCreateItems.as_view(), name='bulk'),
+    path('export/', views.ExportItems.as_view(), name='export'),
+    path('facets/', views.ItemFacets.as_view(), name='facets'),
+    path('search/', views.SearchItems.as_view(), name='search'),
+    path('<uuid:pk>/', ItemDetail.as_view(), name='resource'),
+    path('interest/', ShowInterest.as_view(), name='interest'),
+    path('marksold/', MarkAsSold.as_view(), name='marksold'),
 ]
@@ -1,26 +1,95 @@
+from uuid import UUID
+
 from rest_framework import generics, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import ErrorDetail
+from rest_framework.exceptions import ErrorDetail, ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
 
-from item.serializers import ItemSerializer
-from core.models import Buyer, Item
+from core.asynchronous import AsyncAPIViewMixin
+from core import queue
+from core.authentication import CachedTokenAuthentication
+from core.throttling import ClientRateThrottle, EmailRateThrottle
+from item import export
+from item.archive import ArchivedItemsMixin
+from item.cache import FeedCacheMixin, ItemConditionalMixin, bump_feed_version
+from item.fastpath import FastItemListMixin, FastItemRetrieveMixin
+from item.filters import ItemFilter
+from item.pagination import FeedCursorPagination
+from item.parsers import NDJSONParser
+from item.renderers import CSVRenderer, NDJSONRenderer
+from item.serializers import ItemCardSerializer, ItemSerializer
+from core.models import Buyer, Item, Profile
 
 
-class Items(generics.ListCreateAPIView):
+class Items(FeedCacheMixin, ArchivedItemsMixin, FastItemListMixin, generics.ListCreateAPIView):
     """List all the user created items. Can create new items"""
     serializer_class = ItemSerializer
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
+    pagination_class = FeedCursorPagination
+    filter_backends = [ItemFilter, ]
 
     def get_queryset(self):
+        columns = self.get_columns()
         if self.request.user.is_authenticated:
-            return Item.objects.filter(user=self.request.user)
+            return Item.objects.for_listing(columns).filter(user=self.request.user)
         else:
-            return Item.objects.filter(is_sold=False).order_by('-created_at')
+            return Item.objects.for_listing(columns).filter(is_sold=False).order_by('-created_at')
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET' and self.request.query_params.get('view') == 'card':
+            return ItemCardSerializer
+
+        return ItemSerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs.setdefault('fields', self.get_requested_fields())
+
+        return super().get_serializer(*args, **kwargs)
+
+    def get_requested_fields(self):
+        """Return the fields named in ?fields=, or None for every field of the serializer"""
+        params = self.request.query_params
+        allowed = self.get_serializer_class().Meta.fields
+
+        if 'view' in params and params['view'] != 'card':
+            raise ValidationError({'view': 'Please provide card for view'})
+        if 'fields' not in params:
+            return None
+
+        fields = [field for field in params['fields'].split(',') if field]
+        if not fields or set(fields) - set(allowed):
+            raise ValidationError({'fields': 'Please provide a comma separated list of %s for fields' % ', '.join(allowed)})
+
+        return fields
+
+    def get_columns(self):
+        """Columns to load, the requested fields plus those the ordering and pagination read"""
+        if self.request.method != 'GET':
+            return None
+
+        fields = self.get_requested_fields() or self.get_serializer_class().Meta.fields
+        ordering = [field.lstrip('-') for field in self.get_feed_ordering()]
+
+        return list(dict.fromkeys(list(fields) + ordering))
+
+    def paginate_queryset(self, queryset):
+        """Only the public feed is paginated, sellers get their full listing"""
+        if self.request.user.is_authenticated:
+            return None
+
+        return super().paginate_queryset(queryset)
+
+    def get_feed_ordering(self):
+        # Unknown sort orders are rejected by ItemFilter
+        orderings = ItemFilter.sort_orderings
+        return orderings.get(self.request.query_params.get('sort'), orderings['newest'])
 
     def get_permissions(self):
         if self.request.method in ['POST']:
@@ -31,16 +100,112 @@ class Items(generics.ListCreateAPIView):
         return [permission() for permission in permission_classes]
 
 
-class ItemDetail(generics.RetrieveUpdateDestroyAPIView):
+class BulkCreateItems(APIView):
+    """Create many items from a JSON array or NDJSON stream, skipping invalid rows"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [IsAuthenticated, ]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        rows = request.data
+
+        message = self.validate(rows)
+        if message:
+            return Response(message, status=status.HTTP_400_BAD_REQUEST)
+
+        items, errors = [], []
+        serializer = ItemSerializer()
+        seller_state = Profile.objects.state_of(request.user)
+        for index, row in enumerate(rows):
+            try:
+                items.append(Item(user=request.user, seller_state=seller_state, **serializer.run_validation(row)))
+            except ValidationError as exc:
+                errors.append({'index': index, 'errors': exc.detail})
+
+        if items:
+            with transaction.atomic():
+                Item.objects.bulk_create(items, batch_size=settings.ITEM_BULK_BATCH_SIZE)
+            bump_feed_version()
+
+        data = {'created': [item.id for item in items], 'errors': errors}
+        return Response(data, status=status.HTTP_201_CREATED if items else status.HTTP_400_BAD_REQUEST)
+
+    def validate(self, rows):
+        message = {}
+        if not isinstance(rows, list) or not rows:
+            message['items'] = 'Please provide a list of items'
+        elif len(rows) > settings.ITEM_BULK_MAX_ROWS:
+            message['items'] = 'Please provide at most %d items' % settings.ITEM_BULK_MAX_ROWS
+
+        return message
+
+
+class ExportItems(APIView):
+    """Stream the seller's items and their buyers as NDJSON or CSV"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    permission_classes = [IsAuthenticated, ]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        renderer = request.accepted_renderer
+        items = export.iter_seller_items(request.user, settings.ITEM_EXPORT_CHUNK_SIZE)
+        rows = export.stream_csv(items) if renderer.format == 'csv' else export.stream_ndjson(items)
+
+        response = StreamingHttpResponse(rows, content_type='%s; charset=%s' % (renderer.media_type, renderer.charset))
+        response['Content-Disposition'] = 'attachment; filename="items.%s"' % renderer.format
+
+        return response
+
+
+class SearchItems(FeedCacheMixin, generics.ListAPIView):
+    """Search the unsold items by name and description, best matches first"""
+    serializer_class = ItemSerializer
+    authentication_classes = [CachedTokenAuthentication, ]
+    pagination_class = FeedCursorPagination
+    filter_backends = [ItemFilter, ]
+    feed_ordering = ('-rank', '-created_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get('q', '').strip():
+            message = {'q': 'Please provide a value for q'}
+            return Response(message, status=status.HTTP_400_BAD_REQUEST)
+
+        if 'sort' in request.query_params:
+            message = {'sort': 'Please leave out sort, search results are ordered by relevance'}
+            return Response(message, status=status.HTTP_400_BAD_REQUEST)
+
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return Item.objects.for_listing().filter(is_sold=False).search(self.request.query_params['q'])
+
+
+class ItemFacets(FeedCacheMixin, generics.GenericAPIView):
+    """Count the unsold items per seller state and price bucket, honouring the feed filters"""
+    authentication_classes = [CachedTokenAuthentication, ]
+    filter_backends = [ItemFilter, ]
+
+    def get(self, request, *args, **kwargs):
+        return self.feed_response(self.facets, request, *args, **kwargs)
+
+    def facets(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(queryset.facets())
+
+    def get_queryset(self):
+        return Item.objects.filter(is_sold=False)
+
+
+class ItemDetail(FastItemRetrieveMixin, ItemConditionalMixin, generics.RetrieveUpdateDestroyAPIView):
     """Show a specific item. Can perform update and delete"""
     serializer_class = ItemSerializer
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Item.objects.filter(user=self.request.user)
+            return Item.objects.for_listing().filter(user=self.request.user)
         else:
-            return Item.objects.filter(is_sold=False)
+            return Item.objects.for_listing().filter(is_sold=False)
 
     def get_permissions(self):
         if self.request.method in ['PUT', 'PATCH', 'DELETE']:
@@ -52,6 +217,11 @@ class ItemDetail(generics.RetrieveUpdateDestroyAPIView):
 
 
 class ShowInterest(APIView):
+    authentication_classes = []
+    throttle_classes = [ClientRateThrottle, EmailRateThrottle]
+    throttle_scope = 'interest'
+    throttle_email_scope = 'interest_email'
+
     def post(self, request):
         id = request.data.get('id', None)
         name = request.data.get('name', None)
@@ -63,16 +233,30 @@ class ShowInterest(APIView):
             return Response(message, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            item = Item.objects.get(id=id)
-            buyer = Buyer.objects.create(name=name, email=email, location=location)
-            item.buyers.add(buyer)
-            data = ItemSerializer(item).data
+            item_id = UUID(str(id))
+        except ValueError:
+            item_id = None
+
+        email = Buyer.objects.normalize_email(email)
+        with transaction.atomic():
+            seller = Item.objects.record_interest(item_id, name, email, location) if item_id else None
+            if seller is not None:
+                queue.enqueue(
+                    'item.interest',
+                    {'item': str(item_id), 'name': name, 'email': email, 'location': location},
+                    batch_key='seller:%s' % seller,
+                    delay=settings.ITEM_INTEREST_NOTIFY_DELAY,
+                )
 
-            return Response(data, status=status.HTTP_201_CREATED)
-        except ObjectDoesNotExist:
+        if seller is None:
             message = {'id': 'Item with provided id does not exist'}
             return Response(message, status=status.HTTP_404_NOT_FOUND)
 
+        bump_feed_version()
+        data = {'id': id, 'email': email}
+
+        return Response(data, status=status.HTTP_201_CREATED)
+
     def validate(self, id, name, email, location):
         message = {}
         if id is None:
@@ -94,25 +278,68 @@ class MarkAsSold(APIView):
             return Response(message, status=status.HTTP_401_UNAUTHORIZED)
 
         id = request.data.get('id', None)
+        ids = self.get_ids(request.data)
 
-        message = self.validate(id)
+        message = self.validate(id, ids)
         if message:
             return Response(message, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            item = Item.objects.get(id=id)
-            item.is_sold = True
-            item.save()
-            data = ItemSerializer(item).data
+        if ids is None:
+            ids = [id] if self.is_uuid(id) else []
+
+        with transaction.atomic():
+            changed = Item.objects.mark_sold(request.user, ids)
+            if changed:
+                queue.enqueue_many('item.sold', [({'item': str(item_id)}, 'item:%s' % item_id) for item_id in changed])
 
-            return Response(data, status=status.HTTP_200_OK)
-        except ObjectDoesNotExist:
+        # A single id that changed nothing is either sold already, or not one of the user's items
+        if id is not None and not changed and not Item.objects.filter(pk__in=ids, user=request.user).exists():
             message = {'id': 'Item with provided id does not exist'}
             return Response(message, status=status.HTTP_404_NOT_FOUND)
 
-    def validate(self, id):
+        if changed:
+            bump_feed_version()
+
+        return Response({'ids': [str(item_id) for item_id in changed]}, status=status.HTTP_200_OK)
+
+    def get_ids(self, data):
+        if 'ids' not in data:
+            return None
+
+        return data.getlist('ids') if hasattr(data, 'getlist') else data['ids']
+
+    def validate(self, id, ids):
         message = {}
-        if id is None:
+        if id is None and ids is None:
             message['id'] = 'Please provide a value for id'
+        elif ids is not None:
+            if not isinstance(ids, list) or len(ids) > settings.ITEM_BULK_MAX_ROWS:
+                message['ids'] = 'Please provide a list of at most %d item ids for ids' % settings.ITEM_BULK_MAX_ROWS
+            elif not all(self.is_uuid(item_id) for item_id in ids):
+                message['ids'] = 'Please provide valid item ids for ids'
 
         return message
+
+    def is_uuid(self, value):
+        try:
+            UUID(str(value))
+        except ValueError:
+            return False
+
+        return True
+
+
+class AsyncItems(AsyncAPIViewMixin, Items):
+    """Items served as a coroutine view under ASGI"""
+
+
+class AsyncItemDetail(AsyncAPIViewMixin, ItemDetail):
+    """ItemDetail served as a coroutine view under ASGI"""
+
+
+class AsyncShowInterest(AsyncAPIViewMixin, ShowInterest):
+    """ShowInterest served as a coroutine view under ASGI"""
+
+
+class AsyncMarkAsSold(AsyncAPIViewMixin, MarkAsSold):
+    """MarkAsSold served as a coroutine view under ASGI"""
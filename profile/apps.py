@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ProfileConfig(AppConfig):
     name = 'profile'
+
+    def ready(self):
+        import profile.signals  # noqa: F401
@@ -0,0 +1,60 @@
+"""Per user cache of the serialized profile, retired once a save of the profile or its user commits.
+
+A profile is cached under its user's profile version, read before the profile
+row. Invalidating bumps the version, so a retrieve that read the old row and
+stores it after the invalidation stores it under a version nobody reads again.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.response import Response
+
+
+def profile_cache():
+    return caches[settings.PROFILE_CACHE]
+
+
+def profile_version_key(user_id):
+    return 'profile:version:%s' % user_id
+
+
+def profile_cache_key(user_id, version):
+    return 'profile:%s:%s' % (user_id, version)
+
+
+def get_profile_version(user_id):
+    """Return the user's profile version, starting a new one if it was evicted"""
+    cache = profile_cache()
+    key = profile_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost counter never reuses an old version
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def invalidate_profile(user_id):
+    try:
+        profile_cache().incr(profile_version_key(user_id))
+    except ValueError:
+        get_profile_version(user_id)
+
+
+class ProfileCacheMixin:
+    """Serve the profile of the request's user from the cache, filling it on a miss"""
+
+    def retrieve(self, request, *args, **kwargs):
+        cache = profile_cache()
+        key = profile_cache_key(request.user.pk, get_profile_version(request.user.pk))
+
+        data = cache.get(key)
+        if data is None:
+            response = super().retrieve(request, *args, **kwargs)
+            cache.add(key, response.data, settings.PROFILE_CACHE_TIMEOUT)
+            return response
+
+        return Response(data)
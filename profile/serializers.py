@@ -12,4 +12,4 @@ class ProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('user', )
 
     def get_email(self, obj):
-        return self.instance.user.email
+        return obj.user.email
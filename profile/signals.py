@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Profile, User
+from profile.cache import invalidate_profile
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_saved(sender, instance, **kwargs):
+    # Dropped after commit, or a concurrent retrieve could cache the old row again
+    transaction.on_commit(lambda: invalidate_profile(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """The profile shows the user's email"""
+    if not created:
+        transaction.on_commit(lambda: invalidate_profile(instance.pk))
@@ -1,11 +1,13 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import Profile
+from profile.cache import get_profile_version, profile_cache_key
 from profile.serializers import ProfileSerializer
 
 ME_URL = reverse('profile:me')
@@ -40,6 +42,7 @@ class PrivateProfileApiTests(TestCase):
     """Test the authorized user profile API"""
 
     def setUp(self):
+        cache.clear()
         self.user = create_user(
             email='test@c2c.com',
             password='password'
@@ -74,3 +77,73 @@ class PrivateProfileApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
+
+    def test_retrieve_profile_queries(self):
+        """Test the profile takes one query, then none while it is cached"""
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], 'test@c2c.com')
+        self.assertEqual(cached.data, res.data)
+
+    def test_cached_profile_invalidated(self):
+        """Test profile and user updates are visible on the next retrieve"""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, data={'first_name': 'Changed'})
+        self.assertEqual(self.client.get(ME_URL).data['first_name'], 'Changed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('user:me'), data={'email': 'changed@c2c.com'})
+        self.assertEqual(self.client.get(ME_URL).data['email'], 'changed@c2c.com')
+
+    def test_cached_profile_invalidated_after_commit(self):
+        """Test the cached profile is dropped when the update commits, not before"""
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.patch(ME_URL, data={'first_name': 'Changed'})
+
+        self.assertIsNotNone(cache.get(profile_cache_key(self.user.pk, get_profile_version(self.user.pk))))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.client.get(ME_URL).data['first_name'], 'Changed')
+
+    def test_late_fill_after_invalidation_ignored(self):
+        """Test a retrieve that read the old row and stores it after the invalidation is never served"""
+        version = get_profile_version(self.user.pk)
+        stale = ProfileSerializer(self.profile).data
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, data={'first_name': 'Changed'})
+        cache.set(profile_cache_key(self.user.pk, version), stale)
+
+        self.assertEqual(self.client.get(ME_URL).data['first_name'], 'Changed')
+
+    def test_retrieve_reads_current_email(self):
+        """Test the email comes from the database, not a stale copy of the authenticated user"""
+        get_user_model().objects.filter(pk=self.user.pk).update(email='changed@c2c.com')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], 'changed@c2c.com')
+
+    def test_retrieve_missing_profile(self):
+        """Test a user without a profile gets a 404"""
+        self.client.force_authenticate(create_user(email='other@c2c.com', password='password'))
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_serialize_many(self):
+        """Test each profile of a list shows its own user's email"""
+        other = create_profile(user=create_user(email='other@c2c.com', password='password'), first_name='Other', last_name='User', state_of_residence='AB')
+
+        data = ProfileSerializer(Profile.objects.select_related('user').order_by('first_name'), many=True).data
+
+        self.assertEqual([profile['email'] for profile in data], [other.user.email, self.user.email])
@@ -1,16 +1,19 @@
 from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 
+from core.authentication import CachedTokenAuthentication
+from profile.cache import ProfileCacheMixin
 from profile.serializers import ProfileSerializer
 from core.models import Profile
 
 
-class ProfileDetail(generics.RetrieveUpdateAPIView):
+class ProfileDetail(ProfileCacheMixin, generics.RetrieveUpdateAPIView):
     """Show the authenticated user's profile. Can perform update"""
     serializer_class = ProfileSerializer
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
     permission_classes = [IsAuthenticated, ]
 
     def get_object(self):
-        return Profile.objects.get(user=self.request.user)
+        # The authenticated user may be another process's cached copy, read the email with the profile
+        return get_object_or_404(Profile.objects.select_related('user'), user=self.request.user)
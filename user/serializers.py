@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model, authenticate
+from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
@@ -25,8 +26,9 @@ class UserSerializer(serializers.ModelSerializer):
         last_name = validated_data.pop('last_name', None)
         state_of_residence = validated_data.pop('state_of_residence', None)
 
-        user = get_user_model().objects.create_user(**validated_data)
-        Profile.objects.create(user=user, first_name=first_name, last_name=last_name, state_of_residence=state_of_residence)
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(**validated_data)
+            Profile.objects.create(user=user, first_name=first_name, last_name=last_name, state_of_residence=state_of_residence)
 
         return user
 
@@ -42,6 +44,11 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class ImportUserSerializer(UserSerializer):
+    """Validate a row of a user import, duplicate emails are checked for a whole batch at once"""
+    email = serializers.EmailField(max_length=255)
+
+
 class AuthTokenSerializer(serializers.Serializer):
     """Serializer for the user authentication object"""
     email = serializers.CharField()
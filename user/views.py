@@ -1,21 +1,29 @@
+from django.conf import settings
+
 from rest_framework import generics
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication
+from core.middleware import pin_credentials
+from core.throttling import ClientRateThrottle, EmailRateThrottle
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
 class CreateUser(generics.CreateAPIView):
     """Create new users"""
     serializer_class = UserSerializer
+    # No authentication, so a bogus Authorization header cannot run a password check before the throttle
+    authentication_classes = []
+    throttle_classes = [ClientRateThrottle, ]
+    throttle_scope = 'signup'
 
 
 class UserDetail(generics.RetrieveUpdateAPIView):
     """Show the authenticated user. Can perform update"""
     serializer_class = UserSerializer
-    authentication_classes = [TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
     permission_classes = [IsAuthenticated, ]
 
     def get_object(self):
@@ -26,3 +34,16 @@ class CreateToken(ObtainAuthToken):
     """Create a new auth token for user"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    authentication_classes = []
+    throttle_classes = [ClientRateThrottle, EmailRateThrottle]
+    throttle_scope = 'login'
+    throttle_email_scope = 'login_email'
+
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+
+        # The token may not have reached the replicas when the client first uses it
+        if settings.REPLICA_DATABASES:
+            pin_credentials('%s %s' % (CachedTokenAuthentication.keyword, response.data['token']))
+
+        return response
@@ -0,0 +1,11 @@
+"""Lower bounds, in naira, of the price buckets used for item facets"""
+
+PRICE_BUCKETS = [
+    0,
+    1000,
+    5000,
+    10000,
+    50000,
+    100000,
+    500000,
+]